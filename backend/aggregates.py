@@ -0,0 +1,123 @@
+from typing import Dict, Iterable, Optional, Tuple
+from sqlmodel import SQLModel, Session, select, func, delete
+from models import Period, PopPeriod, PartyPeriod, PeriodAggregate
+
+
+AGGREGATE_FIELDS = ["total_pop_size", "total_eligible_voters", "pop_count", "party_count"]
+
+
+def eligible_voters(pop_size: int, ratio_eligible: int) -> int:
+    """Eligible voters of a pop, counted the same way as in the vote matrix."""
+    return int(pop_size * ratio_eligible / 100) * 1000
+
+
+def period_contribution(obj: Optional[SQLModel]) -> Optional[Tuple[int, Dict[str, int]]]:
+    """Period and aggregate values a PopPeriod or PartyPeriod row contributes (None for other rows)."""
+    if isinstance(obj, PopPeriod):
+        return obj.period_id, {
+            "total_pop_size": obj.pop_size,
+            "total_eligible_voters": eligible_voters(obj.pop_size, obj.ratio_eligible),
+            "pop_count": 1,
+        }
+    if isinstance(obj, PartyPeriod):
+        return obj.period_id, {"party_count": 1}
+    return None
+
+
+def add_contribution_delta(
+    deltas: Dict[int, Dict[str, int]],
+    contribution: Optional[Tuple[int, Dict[str, int]]],
+    sign: int,
+) -> None:
+    """Add (sign 1) or subtract (sign -1) a period_contribution to per-period deltas."""
+    if contribution is None:
+        return
+    period_id, values = contribution
+    period_deltas = deltas.setdefault(period_id, {})
+    for field, value in values.items():
+        period_deltas[field] = period_deltas.get(field, 0) + sign * value
+
+
+def apply_period_aggregate_deltas(db: Session, deltas: Dict[int, Dict[str, int]]) -> None:
+    """
+    Add per-period deltas to PeriodAggregate; sum all changes of a transaction
+    first, as each aggregate row takes one delta per flush. Does not commit.
+    """
+    for period_id, period_deltas in deltas.items():
+        aggregate = db.get(PeriodAggregate, period_id)
+        if aggregate is None:
+            # Not materialized yet: compute it from the rows including this write
+            db.flush()
+            refresh_period_aggregates(db, [period_id])
+            continue
+        for field, delta in period_deltas.items():
+            if delta:
+                # Increment in SQL so concurrent writers cannot lose updates
+                setattr(aggregate, field, getattr(PeriodAggregate, field) + delta)
+
+
+def update_period_aggregates(
+    db: Session,
+    before: Optional[Tuple[int, Dict[str, int]]],
+    after: Optional[Tuple[int, Dict[str, int]]],
+) -> None:
+    """
+    Apply the change from one period_contribution to another to PeriodAggregate.
+
+    before is None for created rows, after is None for deleted rows. The
+    update joins the caller's transaction; nothing is committed here.
+    """
+    deltas: Dict[int, Dict[str, int]] = {}
+    add_contribution_delta(deltas, before, -1)
+    add_contribution_delta(deltas, after, 1)
+    apply_period_aggregate_deltas(db, deltas)
+
+
+def delete_period_aggregate(db: Session, obj: SQLModel) -> None:
+    """Remove the aggregate of a deleted Period (no-op for other rows). Does not commit."""
+    if isinstance(obj, Period):
+        db.exec(delete(PeriodAggregate).where(PeriodAggregate.period_id == obj.id))
+
+
+def refresh_period_aggregates(db: Session, period_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Recompute PeriodAggregate rows from PopPeriod and PartyPeriod (all periods by default).
+
+    Used to backfill the table and after bulk writes that bypass crud. Does not commit.
+    """
+    pop_statement = select(
+        PopPeriod.period_id,
+        func.count(),
+        func.sum(PopPeriod.pop_size),
+        func.sum(PopPeriod.pop_size * PopPeriod.ratio_eligible // 100 * 1000),
+    ).group_by(PopPeriod.period_id)
+    party_statement = select(PartyPeriod.period_id, func.count()).group_by(
+        PartyPeriod.period_id
+    )
+    period_statement = select(Period.id)
+    if period_ids is not None:
+        period_ids = list(period_ids)
+        pop_statement = pop_statement.where(PopPeriod.period_id.in_(period_ids))
+        party_statement = party_statement.where(PartyPeriod.period_id.in_(period_ids))
+        period_statement = period_statement.where(Period.id.in_(period_ids))
+    else:
+        # Drop aggregates of periods that no longer exist
+        db.exec(delete(PeriodAggregate).where(PeriodAggregate.period_id.not_in(select(Period.id))))
+
+    pop_stats = {
+        period_id: (pop_count, total_pop_size, total_eligible_voters)
+        for period_id, pop_count, total_pop_size, total_eligible_voters in db.exec(pop_statement).all()
+    }
+    party_counts = dict(db.exec(party_statement).all())
+
+    for period_id in db.exec(period_statement).all():
+        pop_count, total_pop_size, total_eligible_voters = pop_stats.get(period_id, (0, 0, 0))
+        db.merge(
+            PeriodAggregate(
+                period_id=period_id,
+                total_pop_size=total_pop_size or 0,
+                total_eligible_voters=total_eligible_voters or 0,
+                pop_count=pop_count,
+                party_count=party_counts.get(period_id, 0),
+            )
+        )
@@ -0,0 +1,125 @@
+import heapq
+from typing import Callable, Dict, List, Literal, Sequence
+import numpy as np
+
+
+ApportionmentMethod = Literal["hare", "dhondt", "sainte_lague"]
+
+
+def allocate_by_priority(
+    priorities: List[float], seats: List[int], seats_left: int, next_priority: Callable[[int, int], float]
+) -> List[int]:
+    """
+    Hand out seats_left seats one at a time to the party with the highest priority.
+
+    next_priority(index, seats) gives a party's priority after it received a seat.
+    Ties go to the party listed first. Runs in O(seats_left * log(parties)).
+    """
+    heap = [(-priority, index) for index, priority in enumerate(priorities)]
+    heapq.heapify(heap)
+
+    while seats_left > 0 and heap:
+        _, index = heapq.heappop(heap)
+        seats[index] += 1
+        heapq.heappush(heap, (-next_priority(index, seats[index]), index))
+        seats_left -= 1
+
+    return seats
+
+
+def largest_remainder(votes: Sequence[int], seats: int) -> List[int]:
+    """Allocate seats by the largest remainder method with the Hare quota."""
+    total_votes = sum(votes)
+    allocated = []
+    remainders = []
+
+    # Every party gets the integer part of its exact share first
+    for party_votes in votes:
+        relative_votes = party_votes / total_votes if total_votes > 0 else 0
+        exact_seats = relative_votes * seats
+        allocated.append(int(exact_seats))
+        remainders.append(exact_seats - int(exact_seats))
+
+    # Leftover seats go by remainder; each extra seat lowers the remainder by one
+    base_seats = list(allocated)
+    seats_left = seats - sum(allocated)
+    return allocate_by_priority(
+        remainders,
+        allocated,
+        seats_left,
+        lambda index, party_seats: remainders[index] - (party_seats - base_seats[index]),
+    )
+
+
+def highest_averages(votes: Sequence[int], seats: int, divisor: Callable[[int], float]) -> List[int]:
+    """Allocate seats by a highest averages method: priority is votes / divisor(seats won)."""
+    return allocate_by_priority(
+        [party_votes / divisor(0) for party_votes in votes],
+        [0] * len(votes),
+        seats,
+        lambda index, party_seats: votes[index] / divisor(party_seats),
+    )
+
+
+def dhondt(votes: Sequence[int], seats: int) -> List[int]:
+    """Allocate seats by the D'Hondt method (divisors 1, 2, 3, ...)."""
+    return highest_averages(votes, seats, lambda party_seats: party_seats + 1)
+
+
+def sainte_lague(votes: Sequence[int], seats: int) -> List[int]:
+    """Allocate seats by the Sainte-Laguë method (divisors 1, 3, 5, ...)."""
+    return highest_averages(votes, seats, lambda party_seats: 2 * party_seats + 1)
+
+
+APPORTIONMENT_METHODS: Dict[str, Callable[[Sequence[int], int], List[int]]] = {
+    "hare": largest_remainder,
+    "dhondt": dhondt,
+    "sainte_lague": sainte_lague,
+}
+
+
+def apportion(votes: Sequence[int], seats: int, method: ApportionmentMethod = "hare") -> List[int]:
+    """Allocate seats among parties by vote totals; returns seats per party in input order."""
+    if method not in APPORTIONMENT_METHODS:
+        raise ValueError(f"Unknown apportionment method '{method}'")
+    if seats < 0:
+        raise ValueError("Number of seats must not be negative")
+    return APPORTIONMENT_METHODS[method]([int(party_votes) for party_votes in votes], seats)
+
+
+def largest_remainder_trials(votes: np.ndarray, seats: int) -> np.ndarray:
+    """Vectorized largest_remainder over the rows of a 2D (trials, parties) vote array."""
+    votes = np.asarray(votes, dtype=np.int64)
+    total_votes = votes.sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        relative_votes = np.where(total_votes > 0, votes / total_votes, 0.0)
+    exact_seats = relative_votes * seats
+    allocated = exact_seats.astype(np.int64)
+    remainders = exact_seats - allocated
+
+    # Leftover seats go to the largest remainders, ties to the party listed first
+    seats_left = seats - allocated.sum(axis=-1, keepdims=True)
+    order = np.argsort(-remainders, axis=-1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(votes.shape[-1]), axis=-1)
+    allocated = allocated + (ranks < seats_left)
+
+    # Rows without votes hand out seats in several rounds; use the scalar version
+    for row in np.flatnonzero(seats_left[:, 0] >= votes.shape[-1]):
+        allocated[row] = largest_remainder(votes[row].tolist(), seats)
+    return allocated
+
+
+def apportion_trials(votes: np.ndarray, seats: int, method: ApportionmentMethod = "hare") -> np.ndarray:
+    """Allocate seats for every row of a (trials, parties) vote array; same results as apportion."""
+    if method not in APPORTIONMENT_METHODS:
+        raise ValueError(f"Unknown apportionment method '{method}'")
+    if seats < 0:
+        raise ValueError("Number of seats must not be negative")
+    votes = np.asarray(votes, dtype=np.int64)
+    if method == "hare":
+        return largest_remainder_trials(votes, seats)
+    return np.array(
+        [APPORTIONMENT_METHODS[method](row.tolist(), seats) for row in votes],
+        dtype=np.int64,
+    ).reshape(votes.shape)
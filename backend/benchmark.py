@@ -0,0 +1,326 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlmodel import SQLModel, Session, create_engine, select
+from models import Period, Pop, PopPeriod, Party, PartyPeriod
+from database import configure_engine
+from aggregates import refresh_period_aggregates
+from profiling import simulation_profile, profile_stage
+from simulation import (
+    create_pop_votes,
+    create_election_results,
+    calculate_seats,
+    getCoalitions,
+    get_voting_behavior,
+)
+
+DEFAULT_POPS = [10, 100, 1000]
+DEFAULT_PARTIES = [5, 20, 50]
+DEFAULT_PERIODS = [1, 10, 100]
+QUICK_POPS = [10, 100]
+QUICK_PARTIES = [5, 20]
+QUICK_PERIODS = [1, 10]
+
+BENCHMARK_SEATS = 100
+BENCHMARK_THRESHOLD = 5.0
+BENCHMARK_OPERATIONS = [
+    "create_pop_votes",
+    "create_election_results",
+    "calculate_seats",
+    "getCoalitions",
+    "get_voting_behavior",
+]
+# Relative slowdown of the median wall time reported as a regression by --compare
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+# Slowdowns below this many milliseconds are timer noise, not regressions
+MIN_REGRESSION_MS = 1.0
+
+
+def generate_scenario(db: Session, pops: int, parties: int, periods: int, seed: int) -> None:
+    """Fill an empty database with a seeded synthetic scenario of pops x parties x periods."""
+    rng = np.random.default_rng(seed)
+
+    db.exec(insert(Period), params=[{"year": 2000 + 4 * index} for index in range(periods)])
+    db.exec(insert(Pop), params=[{"name": f"Pop {index}"} for index in range(pops)])
+    db.exec(
+        insert(Party),
+        params=[
+            {"name": f"P{index}", "full_name": f"Party {index}", "color": f"#{rng.integers(0, 0xFFFFFF):06x}"}
+            for index in range(parties)
+        ],
+    )
+    period_ids = db.exec(select(Period.id).order_by(Period.id)).all()
+    pop_ids = db.exec(select(Pop.id).order_by(Pop.id)).all()
+    party_ids = db.exec(select(Party.id).order_by(Party.id)).all()
+
+    for period_id in period_ids:
+        db.exec(
+            insert(PopPeriod),
+            params=[
+                {
+                    "pop_id": pop_id,
+                    "period_id": period_id,
+                    "pop_size": int(rng.integers(1, 50)),
+                    "social_orientation": int(rng.integers(-100, 101)),
+                    "economic_orientation": int(rng.integers(-100, 101)),
+                    "max_political_distance": int(rng.integers(20, 101)),
+                    "variety_tolerance": int(rng.integers(0, 101)),
+                    "non_voters_distance": int(rng.integers(20, 101)),
+                    "small_party_distance": int(rng.integers(0, 101)),
+                    "ratio_eligible": int(rng.integers(50, 101)),
+                }
+                for pop_id in pop_ids
+            ],
+        )
+        db.exec(
+            insert(PartyPeriod),
+            params=[
+                {
+                    "party_id": party_id,
+                    "period_id": period_id,
+                    "social_orientation": int(rng.integers(-100, 101)),
+                    "economic_orientation": int(rng.integers(-100, 101)),
+                    "political_strength": int(rng.integers(0, 101)),
+                }
+                for party_id in party_ids
+            ],
+        )
+    refresh_period_aggregates(db)
+    db.commit()
+
+
+def sample_evenly(values: List[int], count: int) -> List[int]:
+    """Up to count values spread evenly over the list, first and last included."""
+    if len(values) <= count:
+        return list(values)
+    indices = np.linspace(0, len(values) - 1, count).round().astype(int)
+    return [values[index] for index in sorted(set(indices))]
+
+
+def run_operations(
+    db: Session, sample_periods: int, sample_pops: int, repeat: int = 1
+) -> Dict[str, Dict[str, Any]]:
+    """Time the simulation operations repeat times on a sample of the scenario's periods."""
+    period_ids = sample_evenly(db.exec(select(Period.id).order_by(Period.id)).all(), sample_periods)
+
+    def measure(name: str, function: Callable[[], Any]) -> None:
+        with profile_stage(name):
+            try:
+                function()
+            except HTTPException:
+                # E.g. no party passed the threshold; still a measured call
+                errors[name] = errors.get(name, 0) + 1
+                db.rollback()
+
+    errors: Dict[str, int] = {}
+    with simulation_profile(True) as profile:
+        for period_id in period_ids * repeat:
+            measure("create_pop_votes", lambda: create_pop_votes(db, period_id))
+            measure(
+                "create_election_results",
+                lambda: create_election_results(db, period_id, BENCHMARK_SEATS, BENCHMARK_THRESHOLD),
+            )
+            measure("calculate_seats", lambda: calculate_seats(db, period_id, BENCHMARK_SEATS))
+            measure("getCoalitions", lambda: getCoalitions(db, period_id))
+
+            pop_periods = db.exec(
+                select(PopPeriod).where(PopPeriod.period_id == period_id).order_by(PopPeriod.id)
+            ).all()
+            for pop_period in sample_evenly(pop_periods, sample_pops):
+                measure("get_voting_behavior", lambda: get_voting_behavior(db, pop_period.model_dump()))
+
+    results = {}
+    for name in BENCHMARK_OPERATIONS:
+        # Nested stages (e.g. calculate_seats inside create_election_results) are part of their parent
+        stages = [stage for stage in profile.stages if stage["stage"] == name and stage["parent"] is None]
+        if not stages:
+            continue
+        wall_ms = [stage["wall_ms"] for stage in stages]
+        results[name] = {
+            "calls": len(stages),
+            "errors": errors.get(name, 0),
+            "wall_ms": {
+                "min": round(min(wall_ms), 3),
+                "median": round(float(np.median(wall_ms)), 3),
+                "mean": round(float(np.mean(wall_ms)), 3),
+                "max": round(max(wall_ms), 3),
+            },
+            "cpu_ms_median": round(float(np.median([stage["cpu_ms"] for stage in stages])), 3),
+            "queries_per_call": round(float(np.mean([stage["queries"] for stage in stages])), 2),
+            "rows_written_per_call": round(float(np.mean([stage["rows_written"] for stage in stages])), 2),
+        }
+    return results
+
+
+def run_scenario(
+    workdir: str,
+    pops: int,
+    parties: int,
+    periods: int,
+    seed: int,
+    sample_periods: int,
+    sample_pops: int,
+    repeat: int = 1,
+) -> Dict[str, Any]:
+    """Generate one scenario in a fresh SQLite file and benchmark it."""
+    path = os.path.join(workdir, f"benchmark_{pops}x{parties}x{periods}_{seed}.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    engine = create_engine(f"sqlite:///{path}")
+    configure_engine(engine)
+    SQLModel.metadata.create_all(engine)
+    try:
+        with Session(engine) as db:
+            generate_scenario(db, pops, parties, periods, seed)
+        with Session(engine) as db:
+            operations = run_operations(db, sample_periods, sample_pops, repeat)
+    finally:
+        engine.dispose()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    return {"pops": pops, "parties": parties, "periods": periods, "seed": seed, "operations": operations}
+
+
+def get_git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Print median wall time and query changes per scenario and operation; return the regressions."""
+    baseline_scenarios = {
+        (scenario["pops"], scenario["parties"], scenario["periods"], scenario["seed"]): scenario
+        for scenario in baseline["scenarios"]
+    }
+    regressions = []
+    for scenario in current["scenarios"]:
+        key = (scenario["pops"], scenario["parties"], scenario["periods"], scenario["seed"])
+        previous = baseline_scenarios.get(key)
+        if previous is None:
+            continue
+        for name, result in scenario["operations"].items():
+            previous_result = previous["operations"].get(name)
+            if previous_result is None:
+                continue
+            before = previous_result["wall_ms"]["median"]
+            after = result["wall_ms"]["median"]
+            change = (after - before) / before if before > 0 else 0.0
+            label = f"{key[0]} pops x {key[1]} parties x {key[2]} periods  {name}"
+            line = (
+                f"{label:<70} {before:>10.3f} -> {after:>10.3f} ms ({change:+.1%}), "
+                f"queries {previous_result['queries_per_call']:g} -> {result['queries_per_call']:g}"
+            )
+            slower = change > threshold and after - before >= MIN_REGRESSION_MS
+            if slower or result["queries_per_call"] > previous_result["queries_per_call"]:
+                regressions.append(line)
+                line += "  REGRESSION"
+            print(line)
+    return regressions
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",") if size]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the simulation pipeline on seeded synthetic scenarios."
+    )
+    parser.add_argument("--pops", type=parse_sizes, help="Comma-separated pop counts (default 10,100,1000)")
+    parser.add_argument("--parties", type=parse_sizes, help="Comma-separated party counts (default 5,20,50)")
+    parser.add_argument("--periods", type=parse_sizes, help="Comma-separated period counts (default 1,10,100)")
+    parser.add_argument("--quick", action="store_true", help="Small grid of 10,100 pops x 5,20 parties x 1,10 periods")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sample-periods", type=int, default=3, help="Periods per scenario the operations run on")
+    parser.add_argument("--sample-pops", type=int, default=20, help="PopPeriods per period get_voting_behavior runs on")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs of the operations per sampled period")
+    parser.add_argument("--workdir", default=None, help="Directory for the scenario SQLite files (default: temp dir)")
+    parser.add_argument("--output", default=None, help="JSON result file (default: benchmarks/<timestamp>_<commit>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier JSON result file to compare against")
+    parser.add_argument("--regression-threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    pops = args.pops or (QUICK_POPS if args.quick else DEFAULT_POPS)
+    parties = args.parties or (QUICK_PARTIES if args.quick else DEFAULT_PARTIES)
+    periods = args.periods or (QUICK_PERIODS if args.quick else DEFAULT_PERIODS)
+    commit = get_git_commit()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seats": BENCHMARK_SEATS,
+            "threshold": BENCHMARK_THRESHOLD,
+            "sample_periods": args.sample_periods,
+            "sample_pops": args.sample_pops,
+            "repeat": args.repeat,
+        },
+        "scenarios": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        workdir = args.workdir or tempdir
+        os.makedirs(workdir, exist_ok=True)
+        for pop_count, party_count, period_count in itertools.product(pops, parties, periods):
+            scenario = run_scenario(
+                workdir,
+                pop_count,
+                party_count,
+                period_count,
+                args.seed,
+                args.sample_periods,
+                args.sample_pops,
+                args.repeat,
+            )
+            results["scenarios"].append(scenario)
+            summary = ", ".join(
+                f"{name} {result['wall_ms']['median']:.2f} ms / {result['queries_per_call']:g} q"
+                for name, result in scenario["operations"].items()
+            )
+            print(f"{pop_count} pops x {party_count} parties x {period_count} periods: {summary}", file=sys.stderr)
+
+    output = args.output or os.path.join(
+        "benchmarks", f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{commit or 'nocommit'}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare_results(json.load(file), results, args.regression_threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.regression_threshold:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from sqlmodel import SQLModel
+from models import Period, Pop, PopPeriod, Party, PartyPeriod
+
+
+# Version counters of the data cached results depend on. Cache keys embed the
+# versions they were computed at, so bumping a counter orphans every entry
+# computed from the old data. Counters live in this process only.
+data_versions: Dict[Tuple[str, Optional[int]], int] = {}
+versions_lock = threading.Lock()
+
+GLOBAL_VERSION = ("global", None)
+
+
+def get_version(key: Tuple[str, Optional[int]]) -> int:
+    """Current value of a version counter (0 if it was never bumped)."""
+    with versions_lock:
+        return data_versions.get(key, 0)
+
+
+def bump_version(key: Tuple[str, Optional[int]]) -> None:
+    """Increase a version counter, invalidating cache entries keyed on it."""
+    with versions_lock:
+        data_versions[key] = data_versions.get(key, 0) + 1
+
+
+def period_version(period_id: int) -> Tuple[int, int]:
+    """Versions a period's voting behavior depends on: Pops/Parties and the period's rows."""
+    return get_version(GLOBAL_VERSION), get_version(("period", period_id))
+
+
+def pop_period_version(pop_period_id: int) -> int:
+    """Version of a single PopPeriod row."""
+    return get_version(("pop_period", pop_period_id))
+
+
+def bump_versions_for(obj: SQLModel, previous_period_id: Optional[int] = None) -> None:
+    """
+    Bump the versions depending on a created, updated or deleted object.
+
+    Call after the write is committed. previous_period_id is the period an
+    updated PopPeriod or PartyPeriod belonged to before the update.
+    """
+    if isinstance(obj, (Pop, Party)):
+        bump_version(GLOBAL_VERSION)
+    elif isinstance(obj, Period):
+        bump_version(("period", obj.id))
+    elif isinstance(obj, (PopPeriod, PartyPeriod)):
+        for period_id in {obj.period_id, previous_period_id} - {None}:
+            bump_version(("period", period_id))
+        if isinstance(obj, PopPeriod):
+            bump_version(("pop_period", obj.id))
+
+
+class VersionedLRUCache:
+    """Thread-safe LRU cache holding at most maxsize entries."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the entry for key, computing and storing it on a miss.
+
+        key must contain the versions of the data compute reads, taken before
+        compute runs, so a concurrent write can only orphan the new entry.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self.lock:
+            self.entries.clear()
+
+
+voting_behavior_cache = VersionedLRUCache(maxsize=1024)
+distance_scoring_cache = VersionedLRUCache(maxsize=4096)
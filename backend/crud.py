@@ -1,16 +1,36 @@
-from typing import List, Optional, Type, TypeVar
+from typing import Any, Dict, Iterator, List, Optional, Type, TypeVar
 from fastapi import HTTPException
+from pydantic import ValidationError
 from sqlmodel import SQLModel, Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from cache import bump_versions_for
+from aggregates import (
+    period_contribution, update_period_aggregates, delete_period_aggregate,
+    add_contribution_delta, apply_period_aggregate_deltas
+)
 
 T = TypeVar("T", bound=SQLModel)
 
+# Dialects with native INSERT ... ON CONFLICT DO UPDATE support
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# Rows fetched from the cursor at a time by iter_item_rows
+STREAM_CHUNK_SIZE = 1000
+
+# Largest batch accepted by batch_create_items and batch_update_items
+BATCH_MAX_ITEMS = 1000
+
 
 def create_item(db: Session, obj_in: T) -> T:
     try:
         db.add(obj_in)
+        update_period_aggregates(db, None, period_contribution(obj_in))
         db.commit()
         db.refresh(obj_in)
+        bump_versions_for(obj_in)
         return obj_in
     except IntegrityError as e:
         db.rollback()
@@ -32,43 +52,82 @@ def get_item(db: Session, model: Type[T], id: int) -> Optional[T]:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
-def get_items(db: Session, model: Type[T], skip: int = 0, limit: int = 100, filters: dict = None, sort_by: str = None, sort_direction: str = "asc") -> List[T]:
-    try:
-        statement = select(model)
-        
-        # Apply filters
-        if filters:
-            for field, value in filters.items():
-                if hasattr(model, field):
-                    column = getattr(model, field)
-                    statement = statement.where(column == value)
-        
-        # Apply sorting
-        if sort_by and hasattr(model, sort_by):
-            column = getattr(model, sort_by)
-            if sort_direction.lower() == "desc":
-                statement = statement.order_by(column.desc())
-            else:
-                statement = statement.order_by(column.asc())
-        
-        # Apply pagination
-        statement = statement.offset(skip).limit(limit)
-        
+def build_items_statement(model: Type[T], skip: int = 0, limit: Optional[int] = 100, filters: dict = None, sort_by: str = None, sort_direction: str = "asc", after_id: Optional[int] = None):
+    """
+    Build the filtered, sorted and paginated select used by get_items.
+
+    With after_id, pages by keyset on id instead of OFFSET: rows after that
+    id in id order (before it for sort_direction "desc"; 0 starts at the top
+    either way), so deep pages cost the same as the first one. A limit of
+    None returns all rows.
+    """
+    statement = select(model)
+    
+    # Apply filters
+    if filters:
+        for field, value in filters.items():
+            if hasattr(model, field):
+                column = getattr(model, field)
+                statement = statement.where(column == value)
+    
+    # Keyset pagination, ordered by id only
+    if after_id is not None:
+        if sort_by and sort_by != "id":
+            raise HTTPException(status_code=400, detail="after_id pages by id and cannot be combined with sort_by")
+        if sort_direction.lower() == "desc":
+            # Ids start at 1, so after_id 0 starts a descending walk at the highest id
+            if after_id > 0:
+                statement = statement.where(model.id < after_id)
+            return statement.order_by(model.id.desc()).limit(limit)
+        return statement.where(model.id > after_id).order_by(model.id.asc()).limit(limit)
+    
+    # Apply sorting
+    if sort_by and hasattr(model, sort_by):
+        column = getattr(model, sort_by)
+        if sort_direction.lower() == "desc":
+            statement = statement.order_by(column.desc())
+        else:
+            statement = statement.order_by(column.asc())
+    
+    # Apply pagination
+    return statement.offset(skip).limit(limit)
+
+
+def get_items(db: Session, model: Type[T], skip: int = 0, limit: Optional[int] = 100, filters: dict = None, sort_by: str = None, sort_direction: str = "asc", after_id: Optional[int] = None) -> List[T]:
+    try:
+        statement = build_items_statement(model, skip, limit, filters, sort_by, sort_direction, after_id)
         return db.exec(statement).all()
+    except HTTPException:
+        raise
     except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
+def iter_item_rows(db: Session, statement) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the rows of a build_items_statement select as dicts straight from
+    the database cursor, STREAM_CHUNK_SIZE rows at a time, without building
+    model instances.
+    """
+    connection = db.connection().execution_options(stream_results=True, yield_per=STREAM_CHUNK_SIZE)
+    for row in connection.execute(statement).mappings():
+        yield dict(row)
+
+
 def update_item(db: Session, db_obj: T, obj_in: dict) -> T:
     try:
+        previous_period_id = getattr(db_obj, "period_id", None)
+        previous_contribution = period_contribution(db_obj)
         for field, value in obj_in.items():
             if hasattr(db_obj, field):
                 setattr(db_obj, field, value)
         db.add(db_obj)
+        update_period_aggregates(db, previous_contribution, period_contribution(db_obj))
         db.commit()
         db.refresh(db_obj)
+        bump_versions_for(db_obj, previous_period_id)
         return db_obj
     except IntegrityError as e:
         db.rollback()
@@ -87,7 +146,10 @@ def delete_item(db: Session, model: Type[T], id: int) -> T:
         if not obj:
             raise HTTPException(status_code=404, detail="Item not found")
         db.delete(obj)
+        update_period_aggregates(db, period_contribution(obj), None)
+        delete_period_aggregate(db, obj)
         db.commit()
+        bump_versions_for(obj)
         return obj
     except HTTPException:
         raise
@@ -99,4 +161,302 @@ def delete_item(db: Session, model: Type[T], id: int) -> T:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+def bulk_upsert_items(db: Session, model: Type[T], rows: List[Dict[str, Any]], key_fields: List[str], commit: bool = True) -> int:
+    """
+    Insert or update many rows matched on key_fields in a single statement.
+
+    key_fields must be covered by a unique index of the model. Dialects without
+    ON CONFLICT support fall back to one lookup query plus bulk insert/update.
+    """
+    try:
+        upsert_insert = UPSERT_INSERTS.get(db.get_bind().dialect.name)
+        if rows and upsert_insert is not None:
+            statement = upsert_insert(model)
+            update_fields = [field for field in rows[0] if field not in key_fields and field != "id"]
+            statement = statement.on_conflict_do_update(
+                index_elements=key_fields,
+                set_={field: statement.excluded[field] for field in update_fields}
+            )
+            db.exec(statement, params=rows)
+        elif rows:
+            # Look up ids of rows that already exist for the given natural keys
+            statement = select(model.id, *[getattr(model, field) for field in key_fields])
+            for field in key_fields:
+                statement = statement.where(getattr(model, field).in_({row[field] for row in rows}))
+            existing_ids = {tuple(existing[1:]): existing[0] for existing in db.exec(statement).all()}
+
+            inserts = []
+            updates = []
+            for row in rows:
+                existing_id = existing_ids.get(tuple(row[field] for field in key_fields))
+                if existing_id is None:
+                    inserts.append(row)
+                else:
+                    updates.append({**row, "id": existing_id})
+
+            if inserts:
+                db.exec(insert(model), params=inserts)
+            if updates:
+                db.exec(update(model), params=updates)
+        if commit:
+            db.commit()
+        return len(rows)
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Integrity error: {str(e)}")
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+def bulk_update_items(db: Session, model: Type[T], rows: List[Dict[str, Any]], commit: bool = True) -> int:
+    """Update many rows by primary key; every row dict must contain an "id"."""
+    try:
+        if rows:
+            db.exec(update(model), params=rows)
+        if commit:
+            db.commit()
+        return len(rows)
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Integrity error: {str(e)}")
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+def validate_batch_item(model: Type[T], index: int, item: Any, values: Dict[str, Any], errors: List[str]) -> Optional[T]:
+    """Validate one batch item merged into values; problems are appended to errors."""
+    if not isinstance(item, dict):
+        errors.append(f"Item {index}: expected an object")
+        return None
+    unknown_fields = set(item) - set(model.model_fields)
+    if unknown_fields:
+        errors.append(f"Item {index}: unknown fields {', '.join(sorted(unknown_fields))}")
+        return None
+    try:
+        return model.model_validate({**values, **item})
+    except ValidationError as e:
+        for error in e.errors():
+            field = ".".join(str(part) for part in error["loc"])
+            errors.append(f"Item {index}: {field}: {error['msg']}")
+        return None
+
+
+def check_batch_size(items: List[Any]) -> None:
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Batch too large: at most {BATCH_MAX_ITEMS} items")
+
+
+def batch_create_items(db: Session, model: Type[T], items: List[Dict[str, Any]]) -> List[T]:
+    """
+    Validate all items, then insert them with one executemany in one transaction.
+
+    Any invalid item rejects the whole batch with a 400 listing every problem.
+    """
+    check_batch_size(items)
+    errors: List[str] = []
+    objs = []
+    for index, item in enumerate(items):
+        if isinstance(item, dict) and "id" in item:
+            errors.append(f"Item {index}: id is assigned by the database")
+            continue
+        obj = validate_batch_item(model, index, item, {}, errors)
+        if obj is not None:
+            objs.append(obj)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+    if not objs:
+        return []
+
+    try:
+        rows = [obj.model_dump(exclude={"id"}) for obj in objs]
+        ids = db.exec(
+            insert(model).returning(model.id, sort_by_parameter_order=True), params=rows
+        ).scalars().all()
+        deltas: Dict[int, Dict[str, int]] = {}
+        for obj, id in zip(objs, ids):
+            obj.id = id
+            add_contribution_delta(deltas, period_contribution(obj), 1)
+        apply_period_aggregate_deltas(db, deltas)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Integrity error: {str(e)}")
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    for obj in objs:
+        bump_versions_for(obj)
+    return objs
+
+
+def batch_update_items(db: Session, model: Type[T], updates: List[Dict[str, Any]]) -> List[T]:
+    """
+    Apply partial updates, each with the "id" of its row, in one transaction.
+
+    All rows are loaded with one query and every update is validated against
+    its row before anything is written; the merged rows are then written with
+    one executemany. Unknown ids reject the batch with a 404, invalid updates
+    with a 400 listing every problem.
+    """
+    check_batch_size(updates)
+    errors: List[str] = []
+    ids = []
+    for index, item in enumerate(updates):
+        id = item.get("id") if isinstance(item, dict) else None
+        if not isinstance(id, int) or isinstance(id, bool):
+            errors.append(f"Item {index}: an integer id is required")
+        elif id in ids:
+            errors.append(f"Item {index}: duplicate id {id}")
+        else:
+            ids.append(id)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+    if not ids:
+        return []
+
+    try:
+        existing = {obj.id: obj for obj in db.exec(select(model).where(model.id.in_(ids))).all()}
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    missing_ids = [id for id in ids if id not in existing]
+    if missing_ids:
+        raise HTTPException(
+            status_code=404,
+            detail=f"{model.__name__} not found: {', '.join(str(id) for id in missing_ids)}",
+        )
+
+    objs = []
+    for index, item in enumerate(updates):
+        obj = validate_batch_item(model, index, item, existing[item["id"]].model_dump(), errors)
+        if obj is not None:
+            objs.append(obj)
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+
+    try:
+        deltas: Dict[int, Dict[str, int]] = {}
+        for obj in objs:
+            add_contribution_delta(deltas, period_contribution(existing[obj.id]), -1)
+            add_contribution_delta(deltas, period_contribution(obj), 1)
+        # Rows carry every column, so the whole batch is a single executemany
+        db.exec(update(model), params=[obj.model_dump() for obj in objs])
+        apply_period_aggregate_deltas(db, deltas)
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Integrity error: {str(e)}")
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    for obj in objs:
+        bump_versions_for(obj, getattr(existing[obj.id], "period_id", None))
+    return objs
+
+
+# Async variants for routes running on the async engine; same behavior as the sync helpers
+
+async def async_create_item(db: AsyncSession, obj_in: T) -> T:
+    try:
+        db.add(obj_in)
+        await db.run_sync(update_period_aggregates, None, period_contribution(obj_in))
+        await db.commit()
+        await db.refresh(obj_in)
+        bump_versions_for(obj_in)
+        return obj_in
+    except IntegrityError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Integrity error: {str(e)}")
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+async def async_get_item(db: AsyncSession, model: Type[T], id: int) -> Optional[T]:
+    try:
+        return await db.get(model, id)
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+async def async_get_items(db: AsyncSession, model: Type[T], skip: int = 0, limit: Optional[int] = 100, filters: dict = None, sort_by: str = None, sort_direction: str = "asc", after_id: Optional[int] = None) -> List[T]:
+    try:
+        statement = build_items_statement(model, skip, limit, filters, sort_by, sort_direction, after_id)
+        return (await db.exec(statement)).all()
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+async def async_update_item(db: AsyncSession, db_obj: T, obj_in: dict) -> T:
+    try:
+        previous_period_id = getattr(db_obj, "period_id", None)
+        previous_contribution = period_contribution(db_obj)
+        for field, value in obj_in.items():
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, value)
+        db.add(db_obj)
+        await db.run_sync(update_period_aggregates, previous_contribution, period_contribution(db_obj))
+        await db.commit()
+        await db.refresh(db_obj)
+        bump_versions_for(db_obj, previous_period_id)
+        return db_obj
+    except IntegrityError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Integrity error: {str(e)}")
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+async def async_delete_item(db: AsyncSession, model: Type[T], id: int) -> T:
+    try:
+        obj = await db.get(model, id)
+        if not obj:
+            raise HTTPException(status_code=404, detail="Item not found")
+        await db.delete(obj)
+        await db.run_sync(update_period_aggregates, period_contribution(obj), None)
+        await db.run_sync(delete_period_aggregate, obj)
+        await db.commit()
+        bump_versions_for(obj)
+        return obj
+    except HTTPException:
+        raise
+    except IntegrityError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Cannot delete: referenced by other records")
+    except SQLAlchemyError as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
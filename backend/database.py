@@ -0,0 +1,121 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+from dotenv import load_dotenv
+from metrics import instrument_engine
+
+# Load environment variables
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./chronodemica.db")
+
+# SQL statement logging; off unless enabled, so it costs nothing by default
+DATABASE_ECHO = os.getenv("DATABASE_ECHO", "false").lower() in ("1", "true", "yes")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_TIMEOUT = float(os.getenv("DATABASE_POOL_TIMEOUT", "30"))
+
+# SQLite tuning: WAL lets readers run while a simulation writes; NORMAL sync is safe with WAL
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are KiB rather than pages
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", str(-64 * 1024))),
+    "temp_store": "MEMORY",
+}
+
+# Async drivers for the routes running on the event loop
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """Swap the sync driver of a database URL for its async counterpart."""
+    scheme, separator, rest = database_url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + separator + rest
+
+
+def is_sqlite(database_url: str) -> bool:
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+
+def get_engine_options(database_url: str) -> dict:
+    """Pool and logging options shared by the sync and async engine."""
+    options = {"echo": DATABASE_ECHO, "pool_pre_ping": not is_sqlite(database_url)}
+    # In-memory SQLite keeps a single connection per thread and takes no pool sizing
+    if make_url(database_url).database not in (None, "", ":memory:"):
+        options.update(
+            pool_size=DATABASE_POOL_SIZE,
+            max_overflow=DATABASE_MAX_OVERFLOW,
+            pool_timeout=DATABASE_POOL_TIMEOUT,
+        )
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply SQLITE_PRAGMAS to every new SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+
+def set_read_only(connection) -> None:
+    """
+    Switch SQLite's query_only flag to match the read_only execution option.
+
+    The flag stays on the pooled connection, so the pragma only runs when a
+    connection moves between read and write sessions.
+    """
+    read_only = bool(connection.get_execution_options().get("read_only", False))
+    connection_info = connection.connection.info
+    if connection_info.get("read_only", False) != read_only:
+        connection.exec_driver_sql(f"PRAGMA query_only = {'ON' if read_only else 'OFF'}")
+        connection_info["read_only"] = read_only
+
+
+def configure_engine(engine: Engine) -> None:
+    """Register the query metrics and SQLite connection hooks on a (sync or async-wrapped) engine."""
+    instrument_engine(engine)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+        event.listen(engine, "begin", set_read_only)
+
+
+# One engine per driver for the whole process
+engine = create_engine(DATABASE_URL, **get_engine_options(DATABASE_URL))
+configure_engine(engine)
+
+async_engine = create_async_engine(
+    get_async_database_url(DATABASE_URL), **get_engine_options(DATABASE_URL)
+)
+configure_engine(async_engine.sync_engine)
+
+# Read-only views on the same pools; SQLite rejects writes through them
+read_engine = engine.execution_options(read_only=True)
+async_read_engine = async_engine.execution_options(read_only=True)
+
+
+def get_read_session():
+    """Session for endpoints that only read; it never flushes."""
+    with Session(read_engine, autoflush=False) as session:
+        yield session
+
+
+def get_write_session():
+    with Session(engine) as session:
+        yield session
+
+
+async def get_async_read_session():
+    """Async session for endpoints that only read; it never flushes."""
+    async with AsyncSession(async_read_engine, autoflush=False) as session:
+        yield session
+
+
+async def get_async_write_session():
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
@@ -0,0 +1,278 @@
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException
+from sqlmodel import Session
+from apportionment import ApportionmentMethod, apportion_trials
+from snapshot import PeriodSnapshot
+from simulation import (
+    SPECIAL_PARTY_COLUMNS,
+    SPECIAL_PARTIES_CONFIG,
+    build_vote_matrix,
+    find_minimal_winning_coalitions,
+    validate_simulation_prerequisites,
+)
+
+
+# Upper bound of vote matrix cells scored at once; keeps memory flat for any number of trials
+ENSEMBLE_CHUNK_CELLS = 4_000_000
+ENSEMBLE_PERCENTILES = [5, 50, 95]
+# Largest number of seated parties whose coalitions are checked as a subset table
+ENSEMBLE_MAX_SUBSET_PARTIES = 12
+
+# Valid ranges of the perturbed model fields
+ORIENTATION_RANGE = (-100, 100)
+PERCENT_RANGE = (0, 100)
+
+
+def perturb(
+    values: np.ndarray,
+    noise: float,
+    value_range: Tuple[int, int],
+    size: Tuple[int, ...],
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """Add gaussian noise to integer model values, rounded and clipped to their valid range."""
+    if noise <= 0:
+        return np.broadcast_to(values, size)
+    noisy = values + rng.normal(0.0, noise, size=size)
+    return np.clip(np.rint(noisy), *value_range).astype(np.int64)
+
+
+def sample_trial_arrays(
+    snapshot: PeriodSnapshot,
+    trials: int,
+    orientation_noise: float,
+    turnout_noise: float,
+    strength_noise: float,
+    rng: np.random.Generator,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """Draw perturbed pop and party arrays with shapes (trials, P) and (trials, Q)."""
+    pop_size = (trials, len(snapshot.pop_ids))
+    party_size = (trials, len(snapshot.party_ids))
+
+    pop_arrays = dict(snapshot.pop_arrays)
+    for field in ("social_orientation", "economic_orientation"):
+        pop_arrays[field] = perturb(
+            pop_arrays[field], orientation_noise, ORIENTATION_RANGE, pop_size, rng
+        )
+    pop_arrays["ratio_eligible"] = perturb(
+        pop_arrays["ratio_eligible"], turnout_noise, PERCENT_RANGE, pop_size, rng
+    )
+
+    party_arrays = dict(snapshot.party_arrays)
+    party_arrays["political_strength"] = perturb(
+        party_arrays["political_strength"], strength_noise, PERCENT_RANGE, party_size, rng
+    )
+    return pop_arrays, party_arrays
+
+
+def simulate_trial_votes(
+    snapshot: PeriodSnapshot,
+    trials: int,
+    orientation_noise: float,
+    turnout_noise: float,
+    strength_noise: float,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Run perturbed elections and return total votes per trial with shape (trials, Q + 2).
+
+    Columns follow build_vote_matrix: the snapshot's parties, then the special
+    parties. Trials are scored in chunks of (chunk, P, Q + 2) matrices.
+    """
+    rng = np.random.default_rng(seed)
+    columns = len(snapshot.party_ids) + len(SPECIAL_PARTY_COLUMNS)
+    chunk_size = max(1, ENSEMBLE_CHUNK_CELLS // max(1, len(snapshot.pop_ids) * columns))
+
+    totals = np.empty((trials, columns), dtype=np.int64)
+    for start in range(0, trials, chunk_size):
+        chunk = min(chunk_size, trials - start)
+        pop_arrays, party_arrays = sample_trial_arrays(
+            snapshot, chunk, orientation_noise, turnout_noise, strength_noise, rng
+        )
+        votes = build_vote_matrix(pop_arrays, party_arrays)["votes"]
+        totals[start : start + chunk] = votes.sum(axis=-2)
+    return totals
+
+
+def summarize_distribution(values: np.ndarray) -> Dict[str, float]:
+    """Mean, standard deviation and percentiles of one column of trial values."""
+    percentiles = np.percentile(values, ENSEMBLE_PERCENTILES)
+    summary = {"mean": round(float(values.mean()), 2), "std": round(float(values.std()), 2)}
+    for percentile, value in zip(ENSEMBLE_PERCENTILES, percentiles):
+        summary[f"p{percentile}"] = round(float(value), 2)
+    return summary
+
+
+def search_majority_coalitions(
+    party_ids: List[int], seats: np.ndarray, max_parties: Optional[int] = None
+) -> Counter:
+    """Count minimal winning coalitions with find_minimal_winning_coalitions, once per distinct seat row."""
+    counts = Counter()
+    for seat_row, occurrences in Counter(map(tuple, seats.tolist())).items():
+        seated = [
+            (party_id, party_seats)
+            for party_id, party_seats in zip(party_ids, seat_row)
+            if party_seats > 0
+        ]
+        if not seated:
+            continue
+        majority_threshold = sum(party_seats for _, party_seats in seated) // 2 + 1
+        for indices in find_minimal_winning_coalitions(
+            [party_seats for _, party_seats in seated], majority_threshold, max_parties
+        ):
+            counts[tuple(sorted(seated[index][0] for index in indices))] += occurrences
+    return counts
+
+
+def count_majority_coalitions(
+    party_ids: List[int], seats: np.ndarray, max_parties: Optional[int] = None
+) -> Counter:
+    """
+    Count in how many trials each minimal winning coalition of party ids exists.
+
+    With up to ENSEMBLE_MAX_SUBSET_PARTIES seated parties every subset is checked
+    for all trials at once: it is a minimal winning coalition if it reaches the
+    majority and loses it without its smallest member. Larger parliaments fall
+    back to search_majority_coalitions.
+    """
+    seated_columns = np.flatnonzero(seats.any(axis=0))
+    if len(seated_columns) > ENSEMBLE_MAX_SUBSET_PARTIES:
+        return search_majority_coalitions(party_ids, seats, max_parties)
+
+    seats = seats[:, seated_columns]
+    party_count = len(seated_columns)
+    # Row k of subsets holds the members of the coalition with bitmask k
+    subsets = (np.arange(2**party_count)[:, None] >> np.arange(party_count)) & 1 == 1
+    allowed = subsets.sum(axis=-1) <= (party_count if max_parties is None else max_parties)
+    majority_threshold = seats.sum(axis=-1, keepdims=True) // 2 + 1
+
+    subset_counts = np.zeros(len(subsets), dtype=np.int64)
+    chunk_size = max(1, ENSEMBLE_CHUNK_CELLS // len(subsets))
+    for start in range(0, len(seats), chunk_size):
+        chunk = seats[start : start + chunk_size]
+        threshold = majority_threshold[start : start + chunk_size]
+
+        # Adding party k to every subset of the first k parties doubles the table
+        coalition_seats = np.zeros((len(chunk), 1), dtype=np.int64)
+        smallest_member = np.full((len(chunk), 1), np.iinfo(np.int64).max)
+        for column in range(party_count):
+            member_seats = chunk[:, column, None]
+            coalition_seats = np.concatenate(
+                [coalition_seats, coalition_seats + member_seats], axis=-1
+            )
+            smallest_member = np.concatenate(
+                [smallest_member, np.minimum(smallest_member, member_seats)], axis=-1
+            )
+
+        minimal = (coalition_seats >= threshold) & (
+            coalition_seats - smallest_member < threshold
+        )
+        subset_counts += minimal.sum(axis=0)
+
+    return Counter(
+        {
+            tuple(sorted(party_ids[seated_columns[column]] for column in np.flatnonzero(subset))): int(count)
+            for subset, count, is_allowed in zip(subsets, subset_counts, allowed)
+            if count > 0 and is_allowed
+        }
+    )
+
+
+def run_ensemble_simulation(
+    db: Session,
+    period_id: int,
+    seats: int,
+    threshold: float,
+    trials: int = 1000,
+    orientation_noise: float = 5.0,
+    turnout_noise: float = 5.0,
+    strength_noise: float = 5.0,
+    method: ApportionmentMethod = "hare",
+    seed: Optional[int] = None,
+    max_parties: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Run a Monte Carlo ensemble of perturbed elections for a period without writing to the database.
+
+    Pop orientations, ratio_eligible and political_strength get gaussian noise
+    with the given standard deviations. Returns vote share and seat distributions
+    per party and the probability of each minimal winning coalition.
+    """
+    if trials < 1:
+        raise HTTPException(status_code=400, detail="Number of trials must be at least 1")
+
+    snapshot = validate_simulation_prerequisites(db, period_id)
+    totals = simulate_trial_votes(
+        snapshot, trials, orientation_noise, turnout_noise, strength_noise, seed
+    )
+    party_ids = list(snapshot.party_ids) + list(SPECIAL_PARTY_COLUMNS)
+
+    # Same threshold rule as calculate_election_result_data, applied per trial
+    sum_votes = totals.sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage = np.where(sum_votes > 0, totals / sum_votes * 100, 0.0)
+    is_regular = np.array(party_ids) > 0
+    in_parliament = (percentage >= threshold) & (totals > 0) & is_regular
+
+    seat_totals = np.zeros_like(totals)
+    seat_totals[:, is_regular] = apportion_trials(
+        np.where(in_parliament, totals, 0)[:, is_regular], seats, method
+    )
+    # Trials without any party over the threshold have no parliament
+    seat_totals[~in_parliament.any(axis=-1)] = 0
+
+    parties = []
+    for column, party_id in enumerate(party_ids):
+        details = snapshot.get_party_details(party_id) or {
+            "name": SPECIAL_PARTIES_CONFIG[party_id]["name"],
+            "full_name": SPECIAL_PARTIES_CONFIG[party_id]["full_name"],
+            "color": None,
+        }
+        seat_values, seat_counts = np.unique(seat_totals[:, column], return_counts=True)
+        parties.append(
+            {
+                "party_id": party_id,
+                **details,
+                "percentage": summarize_distribution(percentage[:, column]),
+                "seats": summarize_distribution(seat_totals[:, column]),
+                "seat_distribution": {
+                    int(value): round(count / trials, 4)
+                    for value, count in zip(seat_values, seat_counts)
+                },
+                "in_parliament_probability": round(
+                    float(in_parliament[:, column].mean()), 4
+                ),
+            }
+        )
+
+    coalitions = [
+        {
+            "party_ids": list(coalition),
+            "coalition_name": "-".join(
+                snapshot.party_details[party_id]["name"] for party_id in coalition
+            )
+            + " Coalition",
+            "probability": round(count / trials, 4),
+        }
+        for coalition, count in count_majority_coalitions(
+            party_ids, seat_totals, max_parties
+        ).most_common()
+    ]
+
+    return {
+        "period_id": period_id,
+        "parameters": {
+            "seats": seats,
+            "threshold": threshold,
+            "method": method,
+            "trials": trials,
+            "orientation_noise": orientation_noise,
+            "turnout_noise": turnout_noise,
+            "strength_noise": strength_noise,
+            "seed": seed,
+        },
+        "parties": parties,
+        "coalitions": coalitions,
+    }
@@ -1,13 +1,16 @@
-import os
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from sqlmodel import SQLModel, create_engine
-from dotenv import load_dotenv
-from models import Period, Pop, PopPeriod, Party, PartyPeriod, PopVote, ElectionResult
-from routers import router
-
-# Load environment variables
-load_dotenv()
+from fastapi.responses import PlainTextResponse
+from sqlmodel import SQLModel, Session, select, func
+from sqlalchemy import inspect
+from sqlalchemy.exc import IntegrityError
+from models import Period, Pop, PopPeriod, Party, PartyPeriod, PopVote, ElectionResult, PeriodAggregate
+from routers import router, NEXT_AFTER_ID_HEADER
+from database import engine
+from metrics import sql_metrics_middleware, render_metrics
+from simulation import shutdown_process_pool
+from aggregates import refresh_period_aggregates
 
 app = FastAPI(title="Chronodemica Backend", version="0.1.0")
 
@@ -18,18 +21,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets the frontend follow keyset pages of the list endpoints
+    expose_headers=[NEXT_AFTER_ID_HEADER],
 )
 
-# Database setup
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./chronodemica.db")
-engine = create_engine(DATABASE_URL, echo=True)
+# Per-request SQL query metrics, exposed on /metrics
+app.middleware("http")(sql_metrics_middleware)
+
+logger = logging.getLogger(__name__)
+
+# Simulation output that is regenerated on every run; duplicates can be dropped safely
+DERIVED_TABLES = {PopVote.__tablename__, ElectionResult.__tablename__}
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
+def create_natural_key_indexes():
+    """Build indexes declared on the models in databases created before they existed."""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                with engine.begin() as connection:
+                    existing = {existing["name"] for existing in inspect(connection).get_indexes(table.name)}
+                    if index.name in existing:
+                        continue
+                    if index.unique and table.name in DERIVED_TABLES:
+                        # Keep the row the old read-then-write upserts used to update
+                        keep_ids = select(func.min(table.c.id)).group_by(*index.columns)
+                        result = connection.execute(table.delete().where(table.c.id.not_in(keep_ids)))
+                        if result.rowcount:
+                            logger.warning(
+                                "Deleted %d duplicate %s rows before creating index %s",
+                                result.rowcount, table.name, index.name
+                            )
+                    index.create(connection)
+            except IntegrityError:
+                logger.warning(
+                    "Skipping index %s: table %s contains duplicate %s rows",
+                    index.name, table.name, ", ".join(column.name for column in index.columns)
+                )
+
+def create_period_aggregates():
+    """Recompute the materialized period aggregates, e.g. for databases created before they existed."""
+    with Session(engine) as db:
+        refresh_period_aggregates(db)
+        db.commit()
+
 @app.on_event("startup")
 def on_startup():
     create_db_and_tables()
+    create_natural_key_indexes()
+    create_period_aggregates()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    shutdown_process_pool()
 
 app.include_router(router, prefix="/api/v1")
 
@@ -39,4 +85,8 @@ def read_root():
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return render_metrics()
\ No newline at end of file
@@ -0,0 +1,243 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+import numpy as np
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this are logged and counted as slow queries
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "100"))
+# Latest requests per endpoint the p50/p95 quantiles are computed from
+METRICS_WINDOW_SIZE = int(os.getenv("METRICS_WINDOW_SIZE", "1000"))
+METRICS_QUANTILES = [0.5, 0.95]
+METRICS_PREFIX = "chronodemica"
+
+
+class QueryStats:
+    """SQL statements executed by a request or a profiled stage."""
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.slow_queries = 0
+        self.rows_written = 0
+
+    def add(self, other: "QueryStats") -> None:
+        self.queries += other.queries
+        self.sql_seconds += other.sql_seconds
+        self.slow_queries += other.slow_queries
+        self.rows_written += other.rows_written
+
+
+class EndpointMetrics:
+    """Counters and recent samples of one endpoint."""
+
+    def __init__(self):
+        self.requests: Dict[int, int] = defaultdict(int)
+        self.duration_sum = 0.0
+        self.query_sum = 0
+        self.sql_seconds_sum = 0.0
+        self.slow_queries = 0
+        self.durations: Deque[float] = deque(maxlen=METRICS_WINDOW_SIZE)
+        self.query_counts: Deque[int] = deque(maxlen=METRICS_WINDOW_SIZE)
+
+
+current_request_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+# Set while a profiled stage runs, see profiling.profile_stage
+current_stage_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_stage_stats", default=None
+)
+endpoint_metrics: Dict[Tuple[str, str], EndpointMetrics] = defaultdict(EndpointMetrics)
+sql_queries_total = 0
+metrics_lock = threading.Lock()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    # Kept on the statement's execution context, which is discarded with it even if the statement fails
+    if context is not None:
+        context.query_start_time = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Add a finished statement to the current request and stage and flag it if slow."""
+    start_time = getattr(context, "query_start_time", None)
+    if start_time is None:
+        return
+    elapsed = time.perf_counter() - start_time
+    is_slow = elapsed * 1000 >= SLOW_QUERY_THRESHOLD_MS
+    is_write = context is not None and (context.isinsert or context.isupdate or context.isdelete)
+    rows_written = max(cursor.rowcount, 0) if is_write else 0
+
+    for stats in (current_request_stats.get(), current_stage_stats.get()):
+        if stats is not None:
+            stats.queries += 1
+            stats.sql_seconds += elapsed
+            stats.slow_queries += is_slow
+            stats.rows_written += rows_written
+    global sql_queries_total
+    with metrics_lock:
+        sql_queries_total += 1
+
+    if is_slow:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split()))
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement the engine executes; use engine.sync_engine for async engines."""
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def get_endpoint_label(request: Request) -> str:
+    """Path template of the matched route, e.g. /pop/{pop_id}, so label values stay bounded."""
+    route = request.scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def record_request(request: Request, status_code: int, duration: float, stats: QueryStats) -> None:
+    with metrics_lock:
+        metrics = endpoint_metrics[(request.method, get_endpoint_label(request))]
+        metrics.requests[status_code] += 1
+        metrics.duration_sum += duration
+        metrics.query_sum += stats.queries
+        metrics.sql_seconds_sum += stats.sql_seconds
+        metrics.slow_queries += stats.slow_queries
+        metrics.durations.append(duration)
+        metrics.query_counts.append(stats.queries)
+
+
+async def sql_metrics_middleware(request: Request, call_next):
+    """
+    Count queries and SQL time of each request and record them per endpoint.
+
+    The request is recorded once its body has been sent, so streamed responses
+    include the time and the queries spent producing the body.
+    """
+    stats = QueryStats()
+    token = current_request_stats.set(stats)
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except BaseException:
+        record_request(request, 500, time.perf_counter() - start, stats)
+        raise
+    finally:
+        current_request_stats.reset(token)
+
+    body_iterator = response.body_iterator
+
+    async def record_after_body():
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            record_request(request, response.status_code, time.perf_counter() - start, stats)
+
+    response.body_iterator = record_after_body()
+    return response
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """Prometheus label set, escaping backslashes and quotes in the values."""
+    escaped = {
+        key: str(value).replace("\\", "\\\\").replace('"', '\\"')
+        for key, value in labels.items()
+    }
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped.items()) + "}"
+
+
+def format_summary(
+    lines: List[str], name: str, labels: Dict[str, str], samples: List[float], total: float, count: int
+) -> None:
+    """Append the quantile, _sum and _count lines of a Prometheus summary."""
+    if samples:
+        for quantile, value in zip(METRICS_QUANTILES, np.quantile(samples, METRICS_QUANTILES)):
+            lines.append(f"{name}{format_labels({**labels, 'quantile': str(quantile)})} {value:.6g}")
+    lines.append(f"{name}_sum{format_labels(labels)} {total:.6g}")
+    lines.append(f"{name}_count{format_labels(labels)} {count}")
+
+
+def render_metrics() -> str:
+    """Render the request and SQL metrics in the Prometheus text exposition format."""
+    with metrics_lock:
+        endpoints = [
+            (
+                {"method": method, "endpoint": endpoint},
+                {
+                    "requests": dict(metrics.requests),
+                    "request_count": sum(metrics.requests.values()),
+                    "duration_sum": metrics.duration_sum,
+                    "query_sum": metrics.query_sum,
+                    "sql_seconds_sum": metrics.sql_seconds_sum,
+                    "slow_queries": metrics.slow_queries,
+                    "durations": list(metrics.durations),
+                    "query_counts": list(metrics.query_counts),
+                },
+            )
+            for (method, endpoint), metrics in endpoint_metrics.items()
+        ]
+        endpoints.sort(key=lambda item: (item[0]["endpoint"], item[0]["method"]))
+        total_queries = sql_queries_total
+
+    requests_total = f"{METRICS_PREFIX}_http_requests_total"
+    duration = f"{METRICS_PREFIX}_http_request_duration_seconds"
+    queries = f"{METRICS_PREFIX}_sql_queries_per_request"
+    sql_seconds = f"{METRICS_PREFIX}_sql_duration_seconds_total"
+    slow_queries = f"{METRICS_PREFIX}_sql_slow_queries_total"
+    queries_total = f"{METRICS_PREFIX}_sql_queries_total"
+
+    lines = [
+        f"# HELP {requests_total} HTTP requests by endpoint and status code.",
+        f"# TYPE {requests_total} counter",
+    ]
+    for labels, metrics in endpoints:
+        for status_code, count in sorted(metrics["requests"].items()):
+            lines.append(f"{requests_total}{format_labels({**labels, 'status': status_code})} {count}")
+
+    lines += [
+        f"# HELP {duration} Request latency; quantiles over the latest {METRICS_WINDOW_SIZE} requests.",
+        f"# TYPE {duration} summary",
+    ]
+    for labels, metrics in endpoints:
+        format_summary(
+            lines, duration, labels, metrics["durations"], metrics["duration_sum"], metrics["request_count"]
+        )
+
+    lines += [
+        f"# HELP {queries} SQL statements per request; quantiles over the latest {METRICS_WINDOW_SIZE} requests.",
+        f"# TYPE {queries} summary",
+    ]
+    for labels, metrics in endpoints:
+        format_summary(
+            lines, queries, labels, metrics["query_counts"], metrics["query_sum"], metrics["request_count"]
+        )
+
+    lines += [
+        f"# HELP {sql_seconds} Time spent executing SQL statements during requests.",
+        f"# TYPE {sql_seconds} counter",
+    ]
+    for labels, metrics in endpoints:
+        lines.append(f"{sql_seconds}{format_labels(labels)} {metrics['sql_seconds_sum']:.6g}")
+
+    lines += [
+        f"# HELP {slow_queries} SQL statements slower than {SLOW_QUERY_THRESHOLD_MS:g} ms during requests.",
+        f"# TYPE {slow_queries} counter",
+    ]
+    for labels, metrics in endpoints:
+        lines.append(f"{slow_queries}{format_labels(labels)} {metrics['slow_queries']}")
+
+    lines += [
+        f"# HELP {queries_total} SQL statements executed, including outside requests.",
+        f"# TYPE {queries_total} counter",
+        f"{queries_total} {total_queries}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,4 @@
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Index
 
 
 class Period(SQLModel, table=True):
@@ -16,7 +16,10 @@ class Pop(SQLModel, table=True):
 
 
 class PopPeriod(SQLModel, table=True):
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_popperiod_period_pop", "period_id", "pop_id", unique=True),
+        {"extend_existing": True},
+    )
     id: int | None = Field(default=None, primary_key=True)
     pop_id: int = Field(foreign_key="pop.id")
     period_id: int = Field(foreign_key="period.id")
@@ -41,7 +44,10 @@ class Party(SQLModel, table=True):
 
 
 class PartyPeriod(SQLModel, table=True):
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_partyperiod_period_party", "period_id", "party_id", unique=True),
+        {"extend_existing": True},
+    )
     id: int | None = Field(default=None, primary_key=True)
     party_id: int = Field(foreign_key="party.id")
     period_id: int = Field(foreign_key="period.id")
@@ -51,7 +57,10 @@ class PartyPeriod(SQLModel, table=True):
 
 
 class PopVote(SQLModel, table=True):
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_popvote_period_pop_party", "period_id", "pop_id", "party_id", unique=True),
+        {"extend_existing": True},
+    )
     id: int | None = Field(default=None, primary_key=True)
     period_id: int = Field(foreign_key="period.id")
     pop_id: int = Field(foreign_key="pop.id")
@@ -60,7 +69,10 @@ class PopVote(SQLModel, table=True):
 
 
 class ElectionResult(SQLModel, table=True):
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_electionresult_period_party", "period_id", "party_id", unique=True),
+        {"extend_existing": True},
+    )
     id: int | None = Field(default=None, primary_key=True)
     period_id: int = Field(foreign_key="period.id")
     party_id: int = Field(foreign_key="party.id")
@@ -69,4 +81,12 @@ class ElectionResult(SQLModel, table=True):
     seats: int = Field(default=0)
     in_parliament: bool = Field(default=False)
     in_government: bool = Field(default=False)
-    head_of_government: bool = Field(default=False)
\ No newline at end of file
+    head_of_government: bool = Field(default=False)
+
+class PeriodAggregate(SQLModel, table=True):
+    __table_args__ = {"extend_existing": True}
+    period_id: int = Field(foreign_key="period.id", primary_key=True)
+    total_pop_size: int = Field(default=0)
+    total_eligible_voters: int = Field(default=0)
+    pop_count: int = Field(default=0)
+    party_count: int = Field(default=0)
@@ -0,0 +1,125 @@
+from typing import Any, Dict, Type
+from fastapi import HTTPException
+from sqlalchemy import Integer, case, cast, func, insert, literal
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlmodel import SQLModel, Session, select
+from models import Period, Pop, PopPeriod, Party, PartyPeriod
+from aggregates import refresh_period_aggregates
+from cache import bump_versions_for
+
+# Value ranges of the Period Data editor; shifted and scaled values are clamped to them
+ORIENTATION_RANGE = (-100, 100)
+POP_SIZE_RANGE = (0, 100)
+
+
+def clamp(expression, value_range):
+    low, high = value_range
+    return case((expression < low, low), (expression > high, high), else_=expression)
+
+
+def valid_in_year(model: Type[SQLModel], year: int):
+    """Pops or Parties valid in year: valid_from <= year < valid_until, NULL meaning unbounded."""
+    return (
+        (model.valid_from.is_(None)) | (model.valid_from <= year),
+        (model.valid_until.is_(None)) | (model.valid_until > year),
+    )
+
+
+def build_clone_statement(
+    model: Type[SQLModel],
+    owner: Type[SQLModel],
+    owner_field: str,
+    source_period_id: int,
+    target_period_id: int,
+    year: int,
+    overrides: Dict[str, Any],
+):
+    """
+    INSERT ... SELECT copying the source period's rows of model to the target
+    period, skipping rows whose owner (Pop or Party) is not valid in year.
+    """
+    columns = [column.name for column in model.__table__.columns if column.name != "id"]
+    values = []
+    for column in columns:
+        if column == "period_id":
+            values.append(literal(target_period_id))
+        else:
+            values.append(overrides.get(column, getattr(model, column)))
+    source_rows = (
+        select(*values)
+        .join(owner, owner.id == getattr(model, owner_field))
+        .where(model.period_id == source_period_id, *valid_in_year(owner, year))
+        .order_by(model.id)
+    )
+    return insert(model).from_select(columns, source_rows)
+
+
+def clone_period(
+    db: Session,
+    source_period_id: int,
+    year: int,
+    social_shift: int = 0,
+    economic_shift: int = 0,
+    pop_size_factor: float = 1.0,
+) -> Dict[str, Any]:
+    """
+    Create a Period for year with the PopPeriods and PartyPeriods of another period.
+
+    One INSERT ... SELECT per table copies the rows, leaving out Pops and
+    Parties not valid in year. Orientations of pops and parties are shifted
+    and pop sizes scaled on the way, clamped to the editor ranges.
+    """
+    source = db.get(Period, source_period_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Period not found")
+    if db.exec(select(Period.id).where(Period.year == year)).first() is not None:
+        raise HTTPException(status_code=400, detail=f"Period for year {year} already exists")
+
+    orientation_overrides = {}
+    if social_shift:
+        orientation_overrides["social_orientation"] = social_shift
+    if economic_shift:
+        orientation_overrides["economic_orientation"] = economic_shift
+
+    try:
+        period = Period(year=year)
+        db.add(period)
+        db.flush()
+
+        pop_overrides = {
+            field: clamp(getattr(PopPeriod, field) + shift, ORIENTATION_RANGE)
+            for field, shift in orientation_overrides.items()
+        }
+        if pop_size_factor != 1.0:
+            pop_overrides["pop_size"] = clamp(
+                cast(func.round(PopPeriod.pop_size * pop_size_factor), Integer), POP_SIZE_RANGE
+            )
+        pop_result = db.exec(
+            build_clone_statement(PopPeriod, Pop, "pop_id", source.id, period.id, year, pop_overrides)
+        )
+
+        party_overrides = {
+            field: clamp(getattr(PartyPeriod, field) + shift, ORIENTATION_RANGE)
+            for field, shift in orientation_overrides.items()
+        }
+        party_result = db.exec(
+            build_clone_statement(PartyPeriod, Party, "party_id", source.id, period.id, year, party_overrides)
+        )
+
+        # INSERT ... SELECT bypasses crud, so the aggregate is computed here
+        refresh_period_aggregates(db, [period.id])
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Integrity error: {str(e)}")
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    bump_versions_for(period)
+    return {
+        "period": period,
+        "source_period_id": source.id,
+        "pop_periods": pop_result.rowcount,
+        "party_periods": party_result.rowcount,
+    }
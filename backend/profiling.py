@@ -0,0 +1,161 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from metrics import QueryStats, current_stage_stats
+
+# Directory sampling profiles are written to
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class SamplingProfiler:
+    """
+    Sample the Python stacks of threads running backend code at a fixed interval.
+
+    Samples are stored as collapsed stacks (root;...;leaf count), the input
+    format of flamegraph.pl and speedscope. Threads whose stack contains no
+    backend frame, e.g. idle executor threads, are skipped. Work in worker
+    processes is not sampled.
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="sampling-profiler", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id != own_id:
+                    self.sample(frame)
+
+    def sample(self, frame) -> None:
+        stack = []
+        in_backend = False
+        while frame is not None:
+            code = frame.f_code
+            in_backend = in_backend or code.co_filename.startswith(BACKEND_DIR)
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        if in_backend:
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path: str) -> None:
+        """Write the collapsed stacks to path."""
+        with open(path, "w") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
+
+
+class SimulationProfile:
+    """Wall time, process CPU time, SQL statements and rows written per simulation stage."""
+
+    def __init__(self):
+        self.stages: List[Dict[str, Any]] = []
+        self.open_stages: List[str] = []
+        self.sampling_profiler: Optional[SamplingProfiler] = None
+        self.sampling_profile_file: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        top_level = [stage for stage in self.stages if stage["parent"] is None]
+        return {
+            "stages": self.stages,
+            "total": {
+                field: round(sum(stage[field] for stage in top_level), 3)
+                for field in ("wall_ms", "cpu_ms", "queries", "rows_written")
+            },
+            "sampling_profile_file": self.sampling_profile_file,
+        }
+
+
+current_profile: ContextVar[Optional[SimulationProfile]] = ContextVar(
+    "current_profile", default=None
+)
+
+
+@contextmanager
+def profile_stage(name: str) -> Iterator[None]:
+    """
+    Record a stage of the active SimulationProfile; does nothing without one.
+
+    Stages may nest: a nested stage names its parent, and its statements also
+    count towards the parent.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    stats = QueryStats()
+    parent_stats = current_stage_stats.get()
+    token = current_stage_stats.set(stats)
+    # Stages are listed in the order they start
+    stage = {"stage": name, "parent": profile.open_stages[-1] if profile.open_stages else None}
+    profile.stages.append(stage)
+    profile.open_stages.append(name)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        wall_ms = (time.perf_counter() - wall_start) * 1000
+        cpu_ms = (time.process_time() - cpu_start) * 1000
+        profile.open_stages.pop()
+        current_stage_stats.reset(token)
+        if parent_stats is not None:
+            parent_stats.add(stats)
+        stage.update(
+            wall_ms=round(wall_ms, 3),
+            cpu_ms=round(cpu_ms, 3),
+            queries=stats.queries,
+            rows_written=stats.rows_written,
+        )
+
+
+@contextmanager
+def simulation_profile(
+    enabled: bool, sampling: bool = False, label: str = "simulation"
+) -> Iterator[Optional[SimulationProfile]]:
+    """
+    Activate a SimulationProfile for the enclosed run if enabled, else yield None.
+
+    With sampling, a SamplingProfiler runs alongside and its collapsed stacks
+    are written to PROFILE_DIR/<label>_<timestamp>.folded.
+    """
+    if not enabled:
+        yield None
+        return
+
+    profile = SimulationProfile()
+    token = current_profile.set(profile)
+    if sampling:
+        profile.sampling_profiler = SamplingProfiler()
+        profile.sampling_profiler.start()
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
+        if profile.sampling_profiler is not None:
+            profile.sampling_profiler.stop()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            path = os.path.join(PROFILE_DIR, f"{label}_{timestamp}.folded")
+            profile.sampling_profiler.write(path)
+            profile.sampling_profile_file = os.path.abspath(path)
@@ -1,81 +1,139 @@
-import os
+import io
+import json
 from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, create_engine, select
-from dotenv import load_dotenv
+from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from models import (
     Period, Pop, PopPeriod, Party, PartyPeriod, 
     PopVote, ElectionResult
 )
 import crud
 import statistics
-from simulation import create_pop_votes, create_election_results, get_voting_behavior, get_distance_scoring_curve, run_complete_simulation, getCoalitions
+from ensemble import run_ensemble_simulation
+from simulation import create_election_results, sweep_election_parameters, get_voting_behavior, get_distance_scoring_curve, run_complete_simulation_async, create_pop_votes_async, run_incremental_simulation, preview_simulation, getCoalitions, get_batch_period_ids, run_batch_simulation
+from snapshot import load_period_snapshot
+from apportionment import ApportionmentMethod
+from scenario_io import ScenarioFormat, export_scenario, import_scenario, get_format
+from period_clone import clone_period
+from database import read_engine, get_read_session, get_write_session, get_async_read_session, get_async_write_session
+from cache import voting_behavior_cache, distance_scoring_cache, period_version, pop_period_version
 
-# Load environment variables
-load_dotenv()
+router = APIRouter()
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+DEFAULT_PAGE_SIZE = 100
+# Response header carrying the after_id of the next keyset page
+NEXT_AFTER_ID_HEADER = "X-Next-After-Id"
+
+
+async def list_items(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    model,
+    skip: int,
+    limit: Optional[int],
+    filters: dict,
+    sort_by: Optional[str],
+    sort_direction: str,
+    after_id: Optional[int],
+):
+    """
+    Rows of a list endpoint as JSON, or as NDJSON streamed straight from the
+    database cursor when the client accepts application/x-ndjson.
 
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./chronodemica.db")
-engine = create_engine(DATABASE_URL, echo=True)
+    JSON pages default to DEFAULT_PAGE_SIZE rows; streams are unlimited unless
+    a limit is given. Full keyset pages name the next after_id in a header.
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        statement = crud.build_items_statement(model, skip, limit, filters, sort_by, sort_direction, after_id)
 
-def get_session():
-    with Session(engine) as session:
-        yield session
+        def stream():
+            with Session(read_engine, autoflush=False) as stream_db:
+                for row in crud.iter_item_rows(stream_db, statement):
+                    yield json.dumps(row) + "\n"
 
-router = APIRouter()
+        return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
+
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    items = await crud.async_get_items(db, model, skip, limit, filters, sort_by, sort_direction, after_id)
+    if after_id is not None and len(items) == limit:
+        response.headers[NEXT_AFTER_ID_HEADER] = str(items[-1].id)
+    return items
 
 
 # Period endpoints
 @router.post("/period/", response_model=Period)
-def create_period(period: Period, db: Session = Depends(get_session)):
-    return crud.create_item(db, period)
+async def create_period(period: Period, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_create_item(db, period)
 
 @router.get("/period/", response_model=List[Period])
-def read_periods(
+async def read_periods(
+    request: Request,
+    response: Response,
     skip: int = 0, 
-    limit: int = 100, 
+    limit: Optional[int] = Query(None, description="Page size; 100 for JSON, unlimited for NDJSON"),
     sort_by: Optional[str] = None,
     sort_direction: Optional[str] = "asc",
+    after_id: Optional[int] = Query(None, description="Keyset pagination: rows after this id, in id order"),
     year: Optional[int] = Query(None),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_read_session)
 ):
     filters = {}
     if year is not None:
         filters["year"] = year
-    return crud.get_items(db, Period, skip, limit, filters, sort_by, sort_direction)
+    return await list_items(request, response, db, Period, skip, limit, filters, sort_by, sort_direction, after_id)
 
 @router.get("/period/{period_id}", response_model=Period)
-def read_period(period_id: int, db: Session = Depends(get_session)):
-    period = crud.get_item(db, Period, period_id)
+async def read_period(period_id: int, db: AsyncSession = Depends(get_async_read_session)):
+    period = await crud.async_get_item(db, Period, period_id)
     if not period:
         raise HTTPException(status_code=404, detail="Period not found")
     return period
 
 @router.put("/period/{period_id}", response_model=Period)
-def update_period(period_id: int, period_update: dict, db: Session = Depends(get_session)):
-    period = crud.get_item(db, Period, period_id)
+async def update_period(period_id: int, period_update: dict, db: AsyncSession = Depends(get_async_write_session)):
+    period = await crud.async_get_item(db, Period, period_id)
     if not period:
         raise HTTPException(status_code=404, detail="Period not found")
-    return crud.update_item(db, period, period_update)
+    return await crud.async_update_item(db, period, period_update)
 
 @router.delete("/period/{period_id}", response_model=Period)
-def delete_period(period_id: int, db: Session = Depends(get_session)):
-    return crud.delete_item(db, Period, period_id)
+async def delete_period(period_id: int, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_delete_item(db, Period, period_id)
+
+@router.post("/period/{period_id}/clone")
+async def clone_period_endpoint(
+    period_id: int,
+    year: int = Query(..., description="Year of the new period"),
+    social_shift: int = Query(0, ge=-200, le=200, description="Added to every social orientation"),
+    economic_shift: int = Query(0, ge=-200, le=200, description="Added to every economic orientation"),
+    pop_size_factor: float = Query(1.0, ge=0, description="Factor every pop size is scaled by"),
+    db: AsyncSession = Depends(get_async_write_session)
+):
+    """Create a period for year with the pop and party parameters of this period."""
+    return await db.run_sync(
+        clone_period, period_id, year, social_shift, economic_shift, pop_size_factor
+    )
 
 
 # Pop endpoints
 @router.post("/pop/", response_model=Pop)
-def create_pop(pop: Pop, db: Session = Depends(get_session)):
-    return crud.create_item(db, pop)
+async def create_pop(pop: Pop, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_create_item(db, pop)
 
 @router.get("/pop/", response_model=List[Pop])
-def read_pops(
+async def read_pops(
     period_id: Optional[int] = Query(None, description="Period ID to filter valid pops (optional)"),
     skip: int = 0, 
     limit: int = 100, 
     sort_by: Optional[str] = None,
     sort_direction: Optional[str] = "asc",
     name: Optional[str] = Query(None),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_read_session)
 ):
     from sqlmodel import select
     
@@ -85,7 +143,7 @@ def read_pops(
     # Apply period-based validation only if period_id is provided
     if period_id is not None:
         # Get the period to retrieve the year
-        period = crud.get_item(db, Period, period_id)
+        period = await crud.async_get_item(db, Period, period_id)
         if not period:
             raise HTTPException(status_code=404, detail="Period not found")
         
@@ -112,82 +170,95 @@ def read_pops(
     # Apply pagination
     statement = statement.offset(skip).limit(limit)
     
-    return db.exec(statement).all()
+    return (await db.exec(statement)).all()
 
 @router.get("/pop/{pop_id}", response_model=Pop)
-def read_pop(pop_id: int, db: Session = Depends(get_session)):
-    pop = crud.get_item(db, Pop, pop_id)
+async def read_pop(pop_id: int, db: AsyncSession = Depends(get_async_read_session)):
+    pop = await crud.async_get_item(db, Pop, pop_id)
     if not pop:
         raise HTTPException(status_code=404, detail="Pop not found")
     return pop
 
 @router.put("/pop/{pop_id}", response_model=Pop)
-def update_pop(pop_id: int, pop_update: dict, db: Session = Depends(get_session)):
-    pop = crud.get_item(db, Pop, pop_id)
+async def update_pop(pop_id: int, pop_update: dict, db: AsyncSession = Depends(get_async_write_session)):
+    pop = await crud.async_get_item(db, Pop, pop_id)
     if not pop:
         raise HTTPException(status_code=404, detail="Pop not found")
-    return crud.update_item(db, pop, pop_update)
+    return await crud.async_update_item(db, pop, pop_update)
 
 @router.delete("/pop/{pop_id}", response_model=Pop)
-def delete_pop(pop_id: int, db: Session = Depends(get_session)):
-    return crud.delete_item(db, Pop, pop_id)
+async def delete_pop(pop_id: int, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_delete_item(db, Pop, pop_id)
 
 
 # PopPeriod endpoints
 @router.post("/pop-period/", response_model=PopPeriod)
-def create_pop_period(pop_period: PopPeriod, db: Session = Depends(get_session)):
-    return crud.create_item(db, pop_period)
+async def create_pop_period(pop_period: PopPeriod, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_create_item(db, pop_period)
 
 @router.get("/pop-period/", response_model=List[PopPeriod])
-def read_pop_periods(
+async def read_pop_periods(
+    request: Request,
+    response: Response,
     skip: int = 0, 
-    limit: int = 100, 
+    limit: Optional[int] = Query(None, description="Page size; 100 for JSON, unlimited for NDJSON"),
     sort_by: Optional[str] = None,
     sort_direction: Optional[str] = "asc",
+    after_id: Optional[int] = Query(None, description="Keyset pagination: rows after this id, in id order"),
     pop_id: Optional[int] = Query(None),
     period_id: Optional[int] = Query(None),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_read_session)
 ):
     filters = {}
     if pop_id is not None:
         filters["pop_id"] = pop_id
     if period_id is not None:
         filters["period_id"] = period_id
-    return crud.get_items(db, PopPeriod, skip, limit, filters, sort_by, sort_direction)
+    return await list_items(request, response, db, PopPeriod, skip, limit, filters, sort_by, sort_direction, after_id)
 
 @router.get("/pop-period/{pop_period_id}", response_model=PopPeriod)
-def read_pop_period(pop_period_id: int, db: Session = Depends(get_session)):
-    pop_period = crud.get_item(db, PopPeriod, pop_period_id)
+async def read_pop_period(pop_period_id: int, db: AsyncSession = Depends(get_async_read_session)):
+    pop_period = await crud.async_get_item(db, PopPeriod, pop_period_id)
     if not pop_period:
         raise HTTPException(status_code=404, detail="PopPeriod not found")
     return pop_period
 
 @router.put("/pop-period/{pop_period_id}", response_model=PopPeriod)
-def update_pop_period(pop_period_id: int, pop_period_update: dict, db: Session = Depends(get_session)):
-    pop_period = crud.get_item(db, PopPeriod, pop_period_id)
+async def update_pop_period(pop_period_id: int, pop_period_update: dict, db: AsyncSession = Depends(get_async_write_session)):
+    pop_period = await crud.async_get_item(db, PopPeriod, pop_period_id)
     if not pop_period:
         raise HTTPException(status_code=404, detail="PopPeriod not found")
-    return crud.update_item(db, pop_period, pop_period_update)
+    return await crud.async_update_item(db, pop_period, pop_period_update)
 
 @router.delete("/pop-period/{pop_period_id}", response_model=PopPeriod)
-def delete_pop_period(pop_period_id: int, db: Session = Depends(get_session)):
-    return crud.delete_item(db, PopPeriod, pop_period_id)
+async def delete_pop_period(pop_period_id: int, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_delete_item(db, PopPeriod, pop_period_id)
+
+@router.post("/pop-period/batch", response_model=List[PopPeriod])
+async def create_pop_periods_batch(pop_periods: List[Dict[str, Any]] = Body(...), db: AsyncSession = Depends(get_async_write_session)):
+    """Create many PopPeriods in one transaction; one invalid item rejects the batch."""
+    return await db.run_sync(crud.batch_create_items, PopPeriod, pop_periods)
+
+@router.patch("/pop-period/batch", response_model=List[PopPeriod])
+async def update_pop_periods_batch(pop_period_updates: List[Dict[str, Any]] = Body(...), db: AsyncSession = Depends(get_async_write_session)):
+    """Apply partial updates, each with the id of its PopPeriod, in one transaction."""
+    return await db.run_sync(crud.batch_update_items, PopPeriod, pop_period_updates)
 
 
 # Party endpoints
 @router.post("/party/", response_model=Party)
-def create_party(party: Party, db: Session = Depends(get_session)):
-    return crud.create_item(db, party)
+async def create_party(party: Party, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_create_item(db, party)
 
 @router.get("/party/", response_model=List[Party])
-def read_parties(
+async def read_parties(
     period_id: Optional[int] = Query(None, description="Period ID to filter valid parties (optional)"),
     skip: int = 0, 
     limit: int = 100, 
     sort_by: Optional[str] = None,
     sort_direction: Optional[str] = "asc",
     name: Optional[str] = Query(None),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_read_session)
 ):
     from sqlmodel import select
     
@@ -197,7 +268,7 @@ def read_parties(
     # Apply period-based validation only if period_id is provided
     if period_id is not None:
         # Get the period to retrieve the year
-        period = crud.get_item(db, Period, period_id)
+        period = await crud.async_get_item(db, Period, period_id)
         if not period:
             raise HTTPException(status_code=404, detail="Period not found")
         
@@ -224,135 +295,199 @@ def read_parties(
     # Apply pagination
     statement = statement.offset(skip).limit(limit)
     
-    return db.exec(statement).all()
+    return (await db.exec(statement)).all()
 
 @router.get("/party/{party_id}", response_model=Party)
-def read_party(party_id: int, db: Session = Depends(get_session)):
-    party = crud.get_item(db, Party, party_id)
+async def read_party(party_id: int, db: AsyncSession = Depends(get_async_read_session)):
+    party = await crud.async_get_item(db, Party, party_id)
     if not party:
         raise HTTPException(status_code=404, detail="Party not found")
     return party
 
 @router.put("/party/{party_id}", response_model=Party)
-def update_party(party_id: int, party_update: dict, db: Session = Depends(get_session)):
-    party = crud.get_item(db, Party, party_id)
+async def update_party(party_id: int, party_update: dict, db: AsyncSession = Depends(get_async_write_session)):
+    party = await crud.async_get_item(db, Party, party_id)
     if not party:
         raise HTTPException(status_code=404, detail="Party not found")
-    return crud.update_item(db, party, party_update)
+    return await crud.async_update_item(db, party, party_update)
 
 @router.delete("/party/{party_id}", response_model=Party)
-def delete_party(party_id: int, db: Session = Depends(get_session)):
-    return crud.delete_item(db, Party, party_id)
+async def delete_party(party_id: int, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_delete_item(db, Party, party_id)
 
 
 # PartyPeriod endpoints
 @router.post("/party-period/", response_model=PartyPeriod)
-def create_party_period(party_period: PartyPeriod, db: Session = Depends(get_session)):
-    return crud.create_item(db, party_period)
+async def create_party_period(party_period: PartyPeriod, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_create_item(db, party_period)
 
 @router.get("/party-period/", response_model=List[PartyPeriod])
-def read_party_periods(
+async def read_party_periods(
+    request: Request,
+    response: Response,
     skip: int = 0, 
-    limit: int = 100, 
+    limit: Optional[int] = Query(None, description="Page size; 100 for JSON, unlimited for NDJSON"),
     sort_by: Optional[str] = None,
     sort_direction: Optional[str] = "asc",
+    after_id: Optional[int] = Query(None, description="Keyset pagination: rows after this id, in id order"),
     party_id: Optional[int] = Query(None),
     period_id: Optional[int] = Query(None),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_read_session)
 ):
     filters = {}
     if party_id is not None:
         filters["party_id"] = party_id
     if period_id is not None:
         filters["period_id"] = period_id
-    return crud.get_items(db, PartyPeriod, skip, limit, filters, sort_by, sort_direction)
+    return await list_items(request, response, db, PartyPeriod, skip, limit, filters, sort_by, sort_direction, after_id)
 
 @router.get("/party-period/{party_period_id}", response_model=PartyPeriod)
-def read_party_period(party_period_id: int, db: Session = Depends(get_session)):
-    party_period = crud.get_item(db, PartyPeriod, party_period_id)
+async def read_party_period(party_period_id: int, db: AsyncSession = Depends(get_async_read_session)):
+    party_period = await crud.async_get_item(db, PartyPeriod, party_period_id)
     if not party_period:
         raise HTTPException(status_code=404, detail="PartyPeriod not found")
     return party_period
 
 @router.put("/party-period/{party_period_id}", response_model=PartyPeriod)
-def update_party_period(party_period_id: int, party_period_update: dict, db: Session = Depends(get_session)):
-    party_period = crud.get_item(db, PartyPeriod, party_period_id)
+async def update_party_period(party_period_id: int, party_period_update: dict, db: AsyncSession = Depends(get_async_write_session)):
+    party_period = await crud.async_get_item(db, PartyPeriod, party_period_id)
     if not party_period:
         raise HTTPException(status_code=404, detail="PartyPeriod not found")
-    return crud.update_item(db, party_period, party_period_update)
+    return await crud.async_update_item(db, party_period, party_period_update)
 
 @router.delete("/party-period/{party_period_id}", response_model=PartyPeriod)
-def delete_party_period(party_period_id: int, db: Session = Depends(get_session)):
-    return crud.delete_item(db, PartyPeriod, party_period_id)
+async def delete_party_period(party_period_id: int, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_delete_item(db, PartyPeriod, party_period_id)
+
+@router.post("/party-period/batch", response_model=List[PartyPeriod])
+async def create_party_periods_batch(party_periods: List[Dict[str, Any]] = Body(...), db: AsyncSession = Depends(get_async_write_session)):
+    """Create many PartyPeriods in one transaction; one invalid item rejects the batch."""
+    return await db.run_sync(crud.batch_create_items, PartyPeriod, party_periods)
+
+@router.patch("/party-period/batch", response_model=List[PartyPeriod])
+async def update_party_periods_batch(party_period_updates: List[Dict[str, Any]] = Body(...), db: AsyncSession = Depends(get_async_write_session)):
+    """Apply partial updates, each with the id of its PartyPeriod, in one transaction."""
+    return await db.run_sync(crud.batch_update_items, PartyPeriod, party_period_updates)
 
 
 # PopVote endpoints
 @router.post("/pop-vote/", response_model=PopVote)
-def create_pop_vote(pop_vote: PopVote, db: Session = Depends(get_session)):
-    return crud.create_item(db, pop_vote)
+async def create_pop_vote(pop_vote: PopVote, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_create_item(db, pop_vote)
 
 @router.get("/pop-vote/", response_model=List[PopVote])
-def read_pop_votes(skip: int = 0, limit: int = 100, db: Session = Depends(get_session)):
-    return crud.get_items(db, PopVote, skip, limit)
+async def read_pop_votes(
+    request: Request,
+    response: Response,
+    skip: int = 0, 
+    limit: Optional[int] = Query(None, description="Page size; 100 for JSON, unlimited for NDJSON"),
+    sort_by: Optional[str] = None,
+    sort_direction: Optional[str] = "asc",
+    after_id: Optional[int] = Query(None, description="Keyset pagination: rows after this id, in id order"),
+    period_id: Optional[int] = Query(None),
+    pop_id: Optional[int] = Query(None),
+    party_id: Optional[int] = Query(None),
+    db: AsyncSession = Depends(get_async_read_session)
+):
+    filters = {}
+    if period_id is not None:
+        filters["period_id"] = period_id
+    if pop_id is not None:
+        filters["pop_id"] = pop_id
+    if party_id is not None:
+        filters["party_id"] = party_id
+    return await list_items(request, response, db, PopVote, skip, limit, filters, sort_by, sort_direction, after_id)
 
 @router.get("/pop-vote/{pop_vote_id}", response_model=PopVote)
-def read_pop_vote(pop_vote_id: int, db: Session = Depends(get_session)):
-    pop_vote = crud.get_item(db, PopVote, pop_vote_id)
+async def read_pop_vote(pop_vote_id: int, db: AsyncSession = Depends(get_async_read_session)):
+    pop_vote = await crud.async_get_item(db, PopVote, pop_vote_id)
     if not pop_vote:
         raise HTTPException(status_code=404, detail="PopVote not found")
     return pop_vote
 
 @router.put("/pop-vote/{pop_vote_id}", response_model=PopVote)
-def update_pop_vote(pop_vote_id: int, pop_vote_update: dict, db: Session = Depends(get_session)):
-    pop_vote = crud.get_item(db, PopVote, pop_vote_id)
+async def update_pop_vote(pop_vote_id: int, pop_vote_update: dict, db: AsyncSession = Depends(get_async_write_session)):
+    pop_vote = await crud.async_get_item(db, PopVote, pop_vote_id)
     if not pop_vote:
         raise HTTPException(status_code=404, detail="PopVote not found")
-    return crud.update_item(db, pop_vote, pop_vote_update)
+    return await crud.async_update_item(db, pop_vote, pop_vote_update)
 
 @router.delete("/pop-vote/{pop_vote_id}", response_model=PopVote)
-def delete_pop_vote(pop_vote_id: int, db: Session = Depends(get_session)):
-    return crud.delete_item(db, PopVote, pop_vote_id)
+async def delete_pop_vote(pop_vote_id: int, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_delete_item(db, PopVote, pop_vote_id)
 
 
 # ElectionResult endpoints
 @router.post("/election-result/", response_model=ElectionResult)
-def create_election_result(election_result: ElectionResult, db: Session = Depends(get_session)):
-    return crud.create_item(db, election_result)
+async def create_election_result(election_result: ElectionResult, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_create_item(db, election_result)
 
 @router.get("/election-result/", response_model=List[ElectionResult])
-def read_election_results(
+async def read_election_results(
+    request: Request,
+    response: Response,
     skip: int = 0, 
-    limit: int = 100, 
+    limit: Optional[int] = Query(None, description="Page size; 100 for JSON, unlimited for NDJSON"),
     sort_by: Optional[str] = None,
     sort_direction: Optional[str] = "asc",
+    after_id: Optional[int] = Query(None, description="Keyset pagination: rows after this id, in id order"),
     period_id: Optional[int] = Query(None),
     party_id: Optional[int] = Query(None),
-    db: Session = Depends(get_session)
+    db: AsyncSession = Depends(get_async_read_session)
 ):
     filters = {}
     if period_id is not None:
         filters["period_id"] = period_id
     if party_id is not None:
         filters["party_id"] = party_id
-    return crud.get_items(db, ElectionResult, skip, limit, filters, sort_by, sort_direction)
+    return await list_items(request, response, db, ElectionResult, skip, limit, filters, sort_by, sort_direction, after_id)
 
 @router.get("/election-result/{election_result_id}", response_model=ElectionResult)
-def read_election_result(election_result_id: int, db: Session = Depends(get_session)):
-    election_result = crud.get_item(db, ElectionResult, election_result_id)
+async def read_election_result(election_result_id: int, db: AsyncSession = Depends(get_async_read_session)):
+    election_result = await crud.async_get_item(db, ElectionResult, election_result_id)
     if not election_result:
         raise HTTPException(status_code=404, detail="ElectionResult not found")
     return election_result
 
 @router.put("/election-result/{election_result_id}", response_model=ElectionResult)
-def update_election_result(election_result_id: int, election_result_update: dict, db: Session = Depends(get_session)):
-    election_result = crud.get_item(db, ElectionResult, election_result_id)
+async def update_election_result(election_result_id: int, election_result_update: dict, db: AsyncSession = Depends(get_async_write_session)):
+    election_result = await crud.async_get_item(db, ElectionResult, election_result_id)
     if not election_result:
         raise HTTPException(status_code=404, detail="ElectionResult not found")
-    return crud.update_item(db, election_result, election_result_update)
+    return await crud.async_update_item(db, election_result, election_result_update)
 
 @router.delete("/election-result/{election_result_id}", response_model=ElectionResult)
-def delete_election_result(election_result_id: int, db: Session = Depends(get_session)):
-    return crud.delete_item(db, ElectionResult, election_result_id)
+async def delete_election_result(election_result_id: int, db: AsyncSession = Depends(get_async_write_session)):
+    return await crud.async_delete_item(db, ElectionResult, election_result_id)
+
+
+# Scenario import/export endpoints
+@router.get("/scenario/export")
+def export_scenario_file(
+    format: ScenarioFormat = Query("ndjson", description="ndjson or csv"),
+    include_results: bool = Query(False, description="Also export PopVotes and ElectionResults"),
+):
+    """Stream the whole scenario; the session lives as long as the response streams."""
+    def stream():
+        with Session(read_engine, autoflush=False) as db:
+            yield from export_scenario(db, format, include_results)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="scenario.{format}"'},
+    )
+
+@router.post("/scenario/import")
+def import_scenario_file(
+    file: UploadFile = File(..., description="Scenario file as written by /scenario/export"),
+    format: Optional[ScenarioFormat] = Query(None, description="ndjson or csv (default: from the file name)"),
+    db: Session = Depends(get_write_session)
+):
+    """Import a scenario in a single transaction; ids are remapped to new ones."""
+    text = io.TextIOWrapper(file.file, encoding="utf-8", newline="")
+    return import_scenario(db, text, get_format(file.filename or "", format))
 
 
 # Data structure endpoint
@@ -409,16 +544,43 @@ def get_data_structure(model_name: str):
 
 # Statistics endpoints
 @router.get("/statistics/period/{period_id}/pop-size", response_model=Dict[str, Any])
-def get_period_pop_size_statistics(period_id: int, db: Session = Depends(get_session)):
+def get_period_pop_size_statistics(period_id: int, db: Session = Depends(get_read_session)):
     """Get total pop_size statistics for a specific period."""
     return statistics.get_pop_size_sum(db, period_id)
 
 
+@router.get("/statistics/period/{period_id}/aggregates", response_model=Dict[str, Any])
+def get_period_aggregate_statistics(period_id: int, db: Session = Depends(get_read_session)):
+    """Get total pop_size, eligible voters, pop count and party count of a specific period."""
+    return statistics.get_period_aggregates(db, period_id)
+
+
+@router.get("/statistics/party-results", response_model=Dict[str, Any])
+def get_party_results_over_time(
+    party_id: Optional[int] = Query(None, description="Only include this party (optional)"),
+    db: Session = Depends(get_read_session)
+):
+    """Get the percentage and seats of every party across all periods."""
+    return statistics.get_party_results_over_time(db, party_id)
+
+
+@router.get("/statistics/pop/{pop_id}/voting-behavior", response_model=Dict[str, Any])
+def get_pop_voting_behavior_over_time(pop_id: int, db: Session = Depends(get_read_session)):
+    """Get the vote share of every party within a pop across all periods."""
+    return statistics.get_pop_voting_behavior_over_time(db, pop_id)
+
+
+@router.get("/statistics/pop-composition", response_model=Dict[str, Any])
+def get_pop_composition(db: Session = Depends(get_read_session)):
+    """Get pop_size and population share of every pop across all periods."""
+    return statistics.get_pop_composition(db)
+
+
 # Simulation endpoints
 @router.post("/simulation/period/{period_id}/pop-votes")
-def simulate_pop_votes(period_id: int, db: Session = Depends(get_session)):
+async def simulate_pop_votes(period_id: int, db: AsyncSession = Depends(get_async_write_session)):
     """Generate voting behavior for all populations in a period."""
-    create_pop_votes(db, period_id)
+    await create_pop_votes_async(db, period_id)
     return {"message": f"Pop votes created for period {period_id}"}
 
 
@@ -427,61 +589,152 @@ def simulate_election_results(
     period_id: int, 
     seats: int,
     threshold: float,
-    db: Session = Depends(get_session)
+    method: ApportionmentMethod = Query("hare", description="Seat apportionment method"),
+    db: Session = Depends(get_write_session)
 ):
     """Generate election results and seat allocation for a period."""
-    create_election_results(db, period_id, seats, threshold)
+    create_election_results(db, period_id, seats, threshold, method=method)
     return {
         "message": f"Election results created for period {period_id}",
         "seats": seats,
-        "threshold": threshold
+        "threshold": threshold,
+        "method": method
     }
 
 
+@router.get("/simulation/period/{period_id}/sweep")
+def sweep_election_parameters_endpoint(
+    period_id: int,
+    seats: List[int] = Query(..., description="Seat counts to evaluate (repeat the parameter for several values)"),
+    threshold: List[float] = Query(..., description="Thresholds to evaluate (repeat the parameter for several values)"),
+    method: ApportionmentMethod = Query("hare", description="Seat apportionment method"),
+    db: Session = Depends(get_read_session)
+):
+    """Calculate seat allocations for a grid of seats and thresholds from the stored pop votes."""
+    return sweep_election_parameters(db, period_id, seats, threshold, method)
+
+
 @router.post("/simulation/period/{period_id}/full-simulation")
-def run_full_simulation(
+async def run_full_simulation(
     period_id: int,
     seats: int,
     threshold: float,
-    db: Session = Depends(get_session)
+    method: ApportionmentMethod = Query("hare", description="Seat apportionment method"),
+    profile: bool = Query(False, description="Include timings, SQL statements and rows written per stage"),
+    sampling_profile: bool = Query(False, description="Also write a sampling profile of the run to a local file"),
+    db: AsyncSession = Depends(get_async_write_session)
 ):
     """Run complete simulation with validation and comprehensive results."""
-    return run_complete_simulation(db, period_id, seats, threshold)
+    return await run_complete_simulation_async(db, period_id, seats, threshold, method, profile, sampling_profile)
+
+
+@router.post("/simulation/period/{period_id}/preview")
+def preview_period_simulation(
+    period_id: int,
+    seats: int,
+    threshold: float,
+    pop_periods: List[Dict[str, Any]] = Body([], description="Partial PopPeriods identified by pop_id"),
+    party_periods: List[Dict[str, Any]] = Body([], description="Partial PartyPeriods identified by party_id"),
+    method: ApportionmentMethod = Query("hare", description="Seat apportionment method"),
+    max_parties: Optional[int] = Query(None, ge=1, description="Maximum number of parties per coalition (optional)"),
+    db: Session = Depends(get_read_session)
+):
+    """Preview votes, seats and coalitions for modified parameters without storing anything."""
+    return preview_simulation(
+        db, period_id, seats, threshold, method, pop_periods, party_periods, max_parties
+    )
+
+
+@router.post("/simulation/pop-period/{pop_period_id}/resimulate")
+def resimulate_pop_period(
+    pop_period_id: int,
+    seats: int,
+    threshold: float,
+    method: ApportionmentMethod = Query("hare", description="Seat apportionment method"),
+    db: Session = Depends(get_write_session)
+):
+    """Update a simulated period after a PopPeriod edit by rescoring only that pop."""
+    pop_period = crud.get_item(db, PopPeriod, pop_period_id)
+    if not pop_period:
+        raise HTTPException(status_code=404, detail="PopPeriod not found")
+    return run_incremental_simulation(
+        db, pop_period.period_id, seats, threshold, method, pop_id=pop_period.pop_id
+    )
+
+
+@router.post("/simulation/party-period/{party_period_id}/resimulate")
+def resimulate_party_period(
+    party_period_id: int,
+    seats: int,
+    threshold: float,
+    method: ApportionmentMethod = Query("hare", description="Seat apportionment method"),
+    db: Session = Depends(get_write_session)
+):
+    """Update a simulated period after a PartyPeriod edit, writing only the changed votes."""
+    party_period = crud.get_item(db, PartyPeriod, party_period_id)
+    if not party_period:
+        raise HTTPException(status_code=404, detail="PartyPeriod not found")
+    return run_incremental_simulation(db, party_period.period_id, seats, threshold, method)
+
+
+@router.post("/simulation/batch")
+def run_batch_simulation_endpoint(
+    seats: int,
+    threshold: float,
+    period_ids: Optional[List[int]] = Body(None, description="Period IDs to simulate (optional)"),
+    start_year: Optional[int] = Query(None, description="First year of the period range (optional)"),
+    end_year: Optional[int] = Query(None, description="Last year of the period range (optional)"),
+    method: ApportionmentMethod = Query("hare", description="Seat apportionment method"),
+    db: Session = Depends(get_write_session)
+):
+    """Run complete simulations for a list or year range of periods (all periods if neither is given)."""
+    batch_period_ids = get_batch_period_ids(db, period_ids, start_year, end_year)
+    return run_batch_simulation(db, batch_period_ids, seats, threshold, method)
+
+
+@router.get("/simulation/period/{period_id}/ensemble")
+def run_ensemble_simulation_endpoint(
+    period_id: int,
+    seats: int,
+    threshold: float,
+    trials: int = Query(1000, ge=1, le=100000, description="Number of perturbed elections"),
+    orientation_noise: float = Query(5.0, ge=0, description="Standard deviation of the pop orientation noise"),
+    turnout_noise: float = Query(5.0, ge=0, description="Standard deviation of the ratio_eligible noise"),
+    strength_noise: float = Query(5.0, ge=0, description="Standard deviation of the political_strength noise"),
+    method: ApportionmentMethod = Query("hare", description="Seat apportionment method"),
+    seed: Optional[int] = Query(None, description="Random seed for reproducible ensembles (optional)"),
+    max_parties: Optional[int] = Query(None, ge=1, description="Maximum number of parties per coalition (optional)"),
+    db: Session = Depends(get_read_session)
+):
+    """Run a Monte Carlo ensemble of perturbed elections without storing any results."""
+    return run_ensemble_simulation(
+        db, period_id, seats, threshold, trials, orientation_noise, turnout_noise,
+        strength_noise, method, seed, max_parties
+    )
 
 
 @router.get("/simulation/period/{period_id}/pop/{pop_id}/voting-behavior", response_model=List[Dict[str, Any]])
 def get_pop_voting_behavior(
     period_id: int, 
     pop_id: int, 
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_read_session)
 ):
     """Get detailed voting behavior for a specific population in a period."""
-    # Get the PopPeriod entry
-    pop_periods = crud.get_items(db, PopPeriod, filters={"period_id": period_id, "pop_id": pop_id})
-    if not pop_periods:
-        raise HTTPException(status_code=404, detail="PopPeriod not found")
-    
-    pop_period = pop_periods[0]
-    
-    # Convert to dict for compatibility
-    pop_period_dict = {
-        "pop_id": pop_period.pop_id,
-        "period_id": pop_period.period_id,
-        "social_orientation": pop_period.social_orientation,
-        "economic_orientation": pop_period.economic_orientation,
-        "max_political_distance": pop_period.max_political_distance,
-        "variety_tolerance": pop_period.variety_tolerance,
-        "non_voters_distance": pop_period.non_voters_distance,
-        "small_party_distance": pop_period.small_party_distance,
-        "ratio_eligible": pop_period.ratio_eligible,
-        "pop_size": pop_period.pop_size
-    }
-    
-    return get_voting_behavior(db, pop_period_dict)
+    def compute_voting_behavior():
+        snapshot = load_period_snapshot(db, period_id)
+        pop_period = snapshot.get_pop_period(pop_id)
+        if not pop_period:
+            raise HTTPException(status_code=404, detail="PopPeriod not found")
+        return get_voting_behavior(db, pop_period, snapshot)
+    
+    # Served from memory until a write touches the period's pops or parties
+    return voting_behavior_cache.get_or_compute(
+        (period_id, pop_id, period_version(period_id)), compute_voting_behavior
+    )
 
 
 @router.get("/simulation/period/{period_id}/results", response_model=List[ElectionResult])
-def get_simulation_results(period_id: int, db: Session = Depends(get_session)):
+def get_simulation_results(period_id: int, db: Session = Depends(get_read_session)):
     """Get election results for a period."""
     results = crud.get_items(db, ElectionResult, filters={"period_id": period_id})
     if not results:
@@ -490,36 +743,27 @@ def get_simulation_results(period_id: int, db: Session = Depends(get_session)):
 
 # Pop size ratios endpoint
 @router.get("/pop-size-ratios/{period_id}", response_model=List[dict])
-def get_pop_size_ratios(period_id: int, db: Session = Depends(get_session)):
+def get_pop_size_ratios(period_id: int, db: Session = Depends(get_read_session)):
     """
     Get pop size ratios for a specific period.
     Returns all pops with their pop_size and percentage of total population.
     """
-    from sqlmodel import select, func
-    
     # Verify period exists
     period = crud.get_item(db, Period, period_id)
     if not period:
         raise HTTPException(status_code=404, detail="Period not found")
     
-    # Get all pop-periods for this period with pop details
-    statement = select(PopPeriod, Pop).join(Pop, PopPeriod.pop_id == Pop.id).where(PopPeriod.period_id == period_id)
-    results = db.exec(statement).all()
-    
-    if not results:
-        return []
-    
-    # Calculate total population and ratios
-    total_population = sum(pop_period.pop_size for pop_period, _ in results)
-    
-    pop_ratios = []
-    for pop_period, pop in results:
-        percentage = (pop_period.pop_size / total_population * 100) if total_population > 0 else 0
-        pop_ratios.append({
-            'pop_name': pop.name,
-            'pop_size': pop_period.pop_size,
-            'percentage': round(percentage, 2)
-        })
+    # Totals and percentages are calculated in the database
+    composition = statistics.get_pop_composition(db, period_id)
+    pop_ratios = [
+        {
+            'pop_name': pop['name'],
+            'pop_size': pop['pop_size'][0],
+            'percentage': pop['percentage'][0]
+        }
+        for pop in composition['pops']
+        if pop['pop_size'][0] is not None
+    ]
     
     # Sort by pop_size descending
     pop_ratios.sort(key=lambda x: x['pop_size'], reverse=True)
@@ -528,7 +772,7 @@ def get_pop_size_ratios(period_id: int, db: Session = Depends(get_session)):
 
 
 @router.get("/simulation/period/{period_id}/pop-votes", response_model=List[PopVote])
-def get_simulation_pop_votes(period_id: int, db: Session = Depends(get_session)):
+def get_simulation_pop_votes(period_id: int, db: Session = Depends(get_read_session)):
     """Get all pop votes for a period."""
     votes = crud.get_items(db, PopVote, filters={"period_id": period_id})
     if not votes:
@@ -537,41 +781,50 @@ def get_simulation_pop_votes(period_id: int, db: Session = Depends(get_session))
 
 
 @router.get("/simulation/pop-period/{pop_period_id}/distance-scoring", response_model=List[Dict[str, Any]])
-def get_pop_period_distance_scoring(pop_period_id: int, db: Session = Depends(get_session)):
+def get_pop_period_distance_scoring(pop_period_id: int, db: Session = Depends(get_read_session)):
     """Get distance scoring curve (0-100) for a specific PopPeriod."""
-    # Get the PopPeriod entry
-    pop_period = crud.get_item(db, PopPeriod, pop_period_id)
-    if not pop_period:
-        raise HTTPException(status_code=404, detail="PopPeriod not found")
-    
-    # Convert to dict for compatibility
-    pop_period_dict = {
-        "pop_id": pop_period.pop_id,
-        "period_id": pop_period.period_id,
-        "social_orientation": pop_period.social_orientation,
-        "economic_orientation": pop_period.economic_orientation,
-        "max_political_distance": pop_period.max_political_distance,
-        "variety_tolerance": pop_period.variety_tolerance,
-        "non_voters_distance": pop_period.non_voters_distance,
-        "small_party_distance": pop_period.small_party_distance,
-        "ratio_eligible": pop_period.ratio_eligible,
-        "pop_size": pop_period.pop_size
-    }
+    def compute_scoring_curve():
+        # Get the PopPeriod entry
+        pop_period = crud.get_item(db, PopPeriod, pop_period_id)
+        if not pop_period:
+            raise HTTPException(status_code=404, detail="PopPeriod not found")
+        
+        # Convert to dict for compatibility
+        pop_period_dict = {
+            "pop_id": pop_period.pop_id,
+            "period_id": pop_period.period_id,
+            "social_orientation": pop_period.social_orientation,
+            "economic_orientation": pop_period.economic_orientation,
+            "max_political_distance": pop_period.max_political_distance,
+            "variety_tolerance": pop_period.variety_tolerance,
+            "non_voters_distance": pop_period.non_voters_distance,
+            "small_party_distance": pop_period.small_party_distance,
+            "ratio_eligible": pop_period.ratio_eligible,
+            "pop_size": pop_period.pop_size
+        }
+        return get_distance_scoring_curve(pop_period_dict)
     
-    return get_distance_scoring_curve(pop_period_dict)
+    # Served from memory until the PopPeriod is written
+    return distance_scoring_cache.get_or_compute(
+        (pop_period_id, pop_period_version(pop_period_id)), compute_scoring_curve
+    )
 
 
 @router.get("/simulation/period/{period_id}/coalitions", response_model=List[Dict[str, Any]])
-def get_coalitions_for_period(period_id: int, db: Session = Depends(get_session)):
+def get_coalitions_for_period(
+    period_id: int,
+    max_parties: Optional[int] = Query(None, ge=1, description="Maximum number of parties per coalition (optional)"),
+    db: Session = Depends(get_read_session)
+):
     """Get all possible coalitions with majority for a specific period."""
-    return getCoalitions(db, period_id)
+    return getCoalitions(db, period_id, max_parties=max_parties)
 
 
 @router.post("/simulation/period/{period_id}/make-government")
 def make_government(
     period_id: int,
     party_ids: List[int],
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_write_session)
 ):
     """Update government status for parties in a specific period."""
     
@@ -613,7 +866,7 @@ def make_government(
 def cancel_government(
     period_id: int,
     party_ids: List[int],
-    db: Session = Depends(get_session)
+    db: Session = Depends(get_write_session)
 ):
     """Remove government status from specified parties in a specific period."""
     
@@ -0,0 +1,286 @@
+import argparse
+import csv
+import io
+import json
+import sys
+from typing import Any, Dict, IO, Iterable, Iterator, List, Literal, Optional, Tuple, Type
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlmodel import SQLModel, Session
+from models import Period, Pop, PopPeriod, Party, PartyPeriod, PopVote, ElectionResult
+from aggregates import refresh_period_aggregates
+from cache import GLOBAL_VERSION, bump_version
+
+ScenarioFormat = Literal["ndjson", "csv"]
+
+# Record types in dependency order; a record may only reference records listed before it
+SCENARIO_TYPES: Dict[str, Type[SQLModel]] = {
+    "period": Period,
+    "pop": Pop,
+    "party": Party,
+    "pop_period": PopPeriod,
+    "party_period": PartyPeriod,
+}
+RESULT_TYPES: Dict[str, Type[SQLModel]] = {
+    "pop_vote": PopVote,
+    "election_result": ElectionResult,
+}
+RECORD_TYPES = {**SCENARIO_TYPES, **RESULT_TYPES}
+
+# Record types other records point to, and the foreign key fields pointing to them
+REFERENCED_TYPES = ["period", "pop", "party"]
+FOREIGN_KEYS = {"period_id": "period", "pop_id": "pop", "party_id": "party"}
+
+EXPORT_CHUNK_SIZE = 1000
+IMPORT_CHUNK_SIZE = 1000
+
+
+def get_csv_columns() -> List[str]:
+    """CSV header: the record type, then the columns of all record types in order."""
+    columns = ["type"]
+    for model in RECORD_TYPES.values():
+        columns += [column.name for column in model.__table__.columns if column.name not in columns]
+    return columns
+
+
+def iter_scenario_records(
+    db: Session, include_results: bool = False
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (record type, row) for the whole scenario, streamed from the database in chunks."""
+    record_types = RECORD_TYPES if include_results else SCENARIO_TYPES
+    connection = db.connection().execution_options(
+        stream_results=True, yield_per=EXPORT_CHUNK_SIZE
+    )
+    for record_type, model in record_types.items():
+        table = model.__table__
+        for row in connection.execute(select(table).order_by(table.c.id)).mappings():
+            yield record_type, dict(row)
+
+
+def export_ndjson(records: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """One JSON object per line: {"type": ..., "data": {...}}."""
+    for record_type, row in records:
+        yield json.dumps({"type": record_type, "data": row}) + "\n"
+
+
+def export_csv(records: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    """One CSV row per record under a shared header; columns a type lacks stay empty."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=get_csv_columns())
+    writer.writeheader()
+    for count, (record_type, row) in enumerate(records, start=1):
+        writer.writerow({"type": record_type, **row})
+        if count % EXPORT_CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_scenario(
+    db: Session, format: ScenarioFormat = "ndjson", include_results: bool = False
+) -> Iterator[str]:
+    """Stream the scenario as NDJSON or CSV text chunks."""
+    records = iter_scenario_records(db, include_results)
+    return export_csv(records) if format == "csv" else export_ndjson(records)
+
+
+def parse_ndjson(lines: Iterable[str]) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            yield line_number, record["type"], record["data"]
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Line {line_number}: expected a JSON object with 'type' and 'data'",
+            )
+
+
+def convert_csv_value(model: Type[SQLModel], field: str, value: str) -> Any:
+    """Convert a CSV cell to the Python type of the model column; empty cells are None."""
+    if value == "":
+        return None
+    python_type = model.__table__.columns[field].type.python_type
+    if python_type is bool:
+        return value.strip().lower() in ("true", "1", "yes")
+    if python_type in (int, float):
+        return python_type(value)
+    return value
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[Tuple[int, str, Dict[str, Any]]]:
+    for line_number, row in enumerate(csv.DictReader(lines), start=2):
+        record_type = row.pop("type", None)
+        model = RECORD_TYPES.get(record_type)
+        if model is None:
+            yield line_number, record_type, row
+            continue
+        columns = model.__table__.columns
+        try:
+            data = {
+                field: convert_csv_value(model, field, value)
+                for field, value in row.items()
+                if field in columns and value is not None
+            }
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Line {line_number}: {str(e)}")
+        yield line_number, record_type, data
+
+
+class ScenarioImporter:
+    """
+    Insert parsed records in chunks, remapping ids of the exported database to new ids.
+
+    Periods, Pops and Parties are inserted with RETURNING to learn their new
+    ids; records referencing them get their foreign keys rewritten.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.id_maps: Dict[str, Dict[int, int]] = {record_type: {} for record_type in REFERENCED_TYPES}
+        self.pending_type: Optional[str] = None
+        self.pending_ids: List[Optional[int]] = []
+        self.pending_rows: List[Dict[str, Any]] = []
+        self.counts: Dict[str, int] = {record_type: 0 for record_type in RECORD_TYPES}
+
+    def add(self, line_number: int, record_type: str, data: Dict[str, Any]) -> None:
+        model = RECORD_TYPES.get(record_type)
+        if model is None:
+            raise HTTPException(status_code=400, detail=f"Line {line_number}: unknown record type '{record_type}'")
+        columns = model.__table__.columns
+        unknown_fields = set(data) - set(columns.keys())
+        if unknown_fields:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Line {line_number}: unknown {record_type} fields {', '.join(sorted(unknown_fields))}",
+            )
+
+        # A type change flushes, so referenced records are inserted before their references
+        if record_type != self.pending_type or len(self.pending_rows) >= IMPORT_CHUNK_SIZE:
+            self.flush()
+            self.pending_type = record_type
+
+        row = {field: value for field, value in data.items() if field != "id"}
+        for field, referenced_type in FOREIGN_KEYS.items():
+            if field not in row or field not in columns:
+                continue
+            # Special parties (non-voters, small parties) have fixed ids <= 0
+            if field == "party_id" and row[field] is not None and row[field] <= 0:
+                continue
+            new_id = self.id_maps[referenced_type].get(row[field])
+            if new_id is None:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Line {line_number}: {record_type} references unknown {referenced_type} {row[field]}",
+                )
+            row[field] = new_id
+        self.pending_ids.append(data.get("id"))
+        self.pending_rows.append(row)
+
+    def flush(self) -> None:
+        if not self.pending_rows:
+            return
+        model = RECORD_TYPES[self.pending_type]
+        if self.pending_type in self.id_maps:
+            new_ids = self.db.exec(
+                insert(model).returning(model.id, sort_by_parameter_order=True),
+                params=self.pending_rows,
+            ).scalars().all()
+            for old_id, new_id in zip(self.pending_ids, new_ids):
+                if old_id is not None:
+                    self.id_maps[self.pending_type][old_id] = new_id
+        else:
+            self.db.exec(insert(model), params=self.pending_rows)
+        self.counts[self.pending_type] += len(self.pending_rows)
+        self.pending_ids = []
+        self.pending_rows = []
+
+
+def import_scenario(db: Session, file: IO[str], format: ScenarioFormat = "ndjson") -> Dict[str, Any]:
+    """
+    Import a scenario exported by export_scenario in a single transaction.
+
+    Records are added next to the existing data; a Period year or a Pop or
+    Party name that already exists fails the whole import.
+    """
+    records = parse_csv(file) if format == "csv" else parse_ndjson(file)
+    importer = ScenarioImporter(db)
+    try:
+        for line_number, record_type, data in records:
+            importer.add(line_number, record_type, data)
+        importer.flush()
+        refresh_period_aggregates(db, importer.id_maps["period"].values())
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+    except IntegrityError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Integrity error: {str(e.orig)}")
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    # Bulk inserts bypass crud, so bump the cache versions here
+    bump_version(GLOBAL_VERSION)
+    for period_id in importer.id_maps["period"].values():
+        bump_version(("period", period_id))
+
+    return {
+        "message": "Scenario imported",
+        "counts": importer.counts,
+        "period_ids": importer.id_maps["period"],
+    }
+
+
+def get_format(path: str, format: Optional[str]) -> ScenarioFormat:
+    """Explicit format, else derived from the file extension (NDJSON unless .csv)."""
+    if format:
+        return format
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Import or export a Chronodemica scenario.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Write the scenario of DATABASE_URL to a file")
+    export_parser.add_argument("path", help="Output file, or - for stdout")
+    export_parser.add_argument("--format", choices=["ndjson", "csv"])
+    export_parser.add_argument("--include-results", action="store_true", help="Also export PopVotes and ElectionResults")
+    import_parser = subparsers.add_parser("import", help="Add a scenario file to the DATABASE_URL database")
+    import_parser.add_argument("path", help="Input file, or - for stdin")
+    import_parser.add_argument("--format", choices=["ndjson", "csv"])
+    args = parser.parse_args(argv)
+    format = get_format(args.path, args.format)
+
+    with Session(engine) as db:
+        if args.command == "export":
+            output = sys.stdout if args.path == "-" else open(args.path, "w", newline="")
+            try:
+                for chunk in export_scenario(db, format, args.include_results):
+                    output.write(chunk)
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+        else:
+            input_file = sys.stdin if args.path == "-" else open(args.path, newline="")
+            try:
+                result = import_scenario(db, input_file, format)
+            except HTTPException as e:
+                print(f"Import failed: {e.detail}", file=sys.stderr)
+                return 1
+            finally:
+                if input_file is not sys.stdin:
+                    input_file.close()
+            print(json.dumps(result["counts"]), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
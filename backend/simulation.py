@@ -1,16 +1,41 @@
-from typing import List, Dict, Any
-from sqlmodel import Session
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from typing import List, Dict, Any, Optional
+from sqlmodel import Session, select, func, update
+from sqlmodel.ext.asyncio.session import AsyncSession
 import numpy as np
-from itertools import combinations
 from fastapi import HTTPException
-from models import Pop, Party, PopPeriod, PartyPeriod, PopVote, ElectionResult, Period
-from crud import get_items, create_item, update_item, get_item
-
+from models import PopVote, ElectionResult, Period
+from crud import get_items, bulk_upsert_items, bulk_update_items
+from apportionment import ApportionmentMethod, apportion, apportion_trials
+from profiling import SimulationProfile, profile_stage, simulation_profile
+from snapshot import (
+    PeriodSnapshot,
+    load_period_snapshot,
+    POP_PERIOD_FIELDS,
+    PARTY_PERIOD_FIELDS,
+    FIELD_RANGES,
+)
+
+
+# Shared worker pool used to score batch simulations in parallel
+process_pool: Optional[ProcessPoolExecutor] = None
+process_pool_lock = threading.Lock()
 
 # Constants for configuration
 MAX_DISTANCE_2D = 282.8427  # sqrt(200^2 + 200^2) for -100 to 100 coordinates
 SPECIAL_PARTY_IDS = {"NON_VOTERS": -1, "SMALL_PARTIES": -2}
 
+# Special party columns of the vote matrix and the PopPeriod field used as their distance
+SPECIAL_PARTY_COLUMNS = {
+    SPECIAL_PARTY_IDS["NON_VOTERS"]: "non_voters_distance",
+    SPECIAL_PARTY_IDS["SMALL_PARTIES"]: "small_party_distance",
+}
+
 SPECIAL_PARTIES_CONFIG = {
     SPECIAL_PARTY_IDS["NON_VOTERS"]: {
         "name": "Non-Voters",
@@ -45,6 +70,10 @@ def calculate_score(max_distance: int, variety_tolerance: int, distance: float)
     if distance > max_distance:
         return 0
 
+    # Zero tolerance: only an exact match scores, as in calculate_score_matrix
+    if variety_tolerance == 0:
+        return 100 if distance == 0 else 0
+
     # Calculate using Gauss function
     variety = variety_tolerance / 2
     score = np.exp(-(distance**2) / (2 * variety**2))
@@ -58,202 +87,214 @@ def calculate_adjusted_score(political_strength: int, score: int) -> int:
     return int(score * strength_modifier)
 
 
-def convert_sqlmodel_to_dict(obj, fields: List[str]) -> Dict[str, Any]:
-    """Convert SQLModel object to dictionary with specified fields."""
-    return {field: getattr(obj, field) for field in fields}
+def calculate_distance_matrix(
+    pop_social: np.ndarray,
+    pop_economic: np.ndarray,
+    party_social: np.ndarray,
+    party_economic: np.ndarray,
+) -> np.ndarray:
+    """Vectorized calculate_distance: pop axis (..., P) against party axis (..., Q)."""
+    social_diff = pop_social[..., :, None] - party_social[..., None, :]
+    economic_diff = pop_economic[..., :, None] - party_economic[..., None, :]
+    distance = np.sqrt(social_diff**2 + economic_diff**2)
 
+    # Normalize distance to percentage (0-100), truncated like the scalar version
+    return (distance / MAX_DISTANCE_2D * 100).astype(np.int64)
 
-def create_voting_entry(
-    pop_data: Dict[str, Any], party_data: Dict[str, Any], party_info: Dict[str, Any]
-) -> Dict[str, Any]:
-    """Create a single voting behavior entry."""
-    distance = calculate_distance(
-        pop_data["social_orientation"],
-        pop_data["economic_orientation"],
-        party_data["social_orientation"],
-        party_data["economic_orientation"],
-    )
 
-    raw_score = calculate_score(
-        pop_data["max_political_distance"], pop_data["variety_tolerance"], distance
+def calculate_score_matrix(
+    max_distance: np.ndarray, variety_tolerance: np.ndarray, distance: np.ndarray
+) -> np.ndarray:
+    """Vectorized calculate_score; all arguments must broadcast against each other."""
+    variety = variety_tolerance / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        score = np.exp(-(distance**2) / (2 * variety**2))
+    # Zero tolerance yields 0/0 at distance 0: only an exact match scores
+    score = np.where(np.isnan(score), 1.0, score)
+    score = np.round(score * 100).astype(np.int64)
+
+    # Max distance cap
+    return np.where(distance > max_distance, 0, score)
+
+
+def calculate_adjusted_score_matrix(
+    political_strength: np.ndarray, score: np.ndarray
+) -> np.ndarray:
+    """Vectorized calculate_adjusted_score."""
+    strength_modifier = np.interp(political_strength, [0, 100], [0.05, 1.5])
+    return (score * strength_modifier).astype(np.int64)
+
+
+def build_vote_matrix(
+    pop_arrays: Dict[str, np.ndarray], party_arrays: Dict[str, np.ndarray]
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate the full pop x party voting matrix for one period.
+
+    pop_arrays holds one array per POP_PERIOD_FIELDS entry with shape (..., P),
+    party_arrays one array per PARTY_PERIOD_FIELDS entry with shape (..., Q).
+    Leading axes are broadcast, so stacked trials can be scored in one call.
+    The returned matrices have shape (..., P, Q + 2): the regular parties in
+    input order followed by the Non-Voters and Small Parties columns
+    (see SPECIAL_PARTY_COLUMNS). Every value matches the per-entry functions.
+    """
+    max_distance = pop_arrays["max_political_distance"][..., :, None]
+    variety_tolerance = pop_arrays["variety_tolerance"][..., :, None]
+
+    # Regular parties
+    party_distance = calculate_distance_matrix(
+        pop_arrays["social_orientation"],
+        pop_arrays["economic_orientation"],
+        party_arrays["social_orientation"],
+        party_arrays["economic_orientation"],
+    )
+    party_score = calculate_score_matrix(
+        max_distance, variety_tolerance, party_distance
+    )
+    party_strength = np.broadcast_to(
+        party_arrays["political_strength"][..., None, :], party_score.shape
+    )
+    party_adjusted = calculate_adjusted_score_matrix(party_strength, party_score)
+
+    # Special parties don't get strength adjustment
+    special_distance = np.stack(
+        np.broadcast_arrays(
+            *[pop_arrays[key] for key in SPECIAL_PARTY_COLUMNS.values()]
+        ),
+        axis=-1,
+    ).astype(np.int64)
+    special_distance = np.broadcast_to(
+        special_distance, party_distance.shape[:-1] + special_distance.shape[-1:]
+    )
+    special_score = calculate_score_matrix(
+        max_distance, variety_tolerance, special_distance
     )
 
-    adjusted_score = calculate_adjusted_score(
-        party_data.get("political_strength", 0), raw_score
+    distance = np.concatenate([party_distance, special_distance], axis=-1)
+    raw_score = np.concatenate([party_score, special_score], axis=-1)
+    strength = np.concatenate(
+        [party_strength, np.zeros_like(special_score)], axis=-1
     )
+    adjusted_score = np.concatenate([party_adjusted, special_score], axis=-1)
+
+    # Percentages and votes per pop
+    eligible_population = (
+        (pop_arrays["pop_size"] * pop_arrays["ratio_eligible"]) / 100
+    ).astype(np.int64) * 1000
+    total_score = adjusted_score.sum(axis=-1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentage = np.where(
+            total_score > 0, adjusted_score / total_score * 100, 0.0
+        )
+    votes = (percentage / 100 * eligible_population[..., :, None]).astype(np.int64)
 
     return {
-        "pop_id": pop_data["pop_id"],
-        "pop_name": pop_data["pop_name"],
-        "period_id": pop_data["period_id"],
-        "party_id": party_info["party_id"],
-        "party_name": party_info["party_name"],
-        "party_full_name": party_info["party_full_name"],
         "distance": distance,
         "raw_score": raw_score,
-        "strength": party_data.get("political_strength", 0),
+        "strength": strength,
         "adjusted_score": adjusted_score,
+        "percentage": percentage,
+        "votes": votes,
     }
 
 
-def add_special_parties_voting(pop_data: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Add voting behavior for non-voters and small parties."""
-    special_entries = []
-
-    for party_id, config in SPECIAL_PARTIES_CONFIG.items():
-        distance_key = (
-            "non_voters_distance"
-            if party_id == SPECIAL_PARTY_IDS["NON_VOTERS"]
-            else "small_party_distance"
-        )
-        distance = pop_data[distance_key]
-
-        score = calculate_score(
-            pop_data["max_political_distance"], pop_data["variety_tolerance"], distance
-        )
-
-        entry = {
-            "pop_id": pop_data["pop_id"],
-            "pop_name": pop_data["pop_name"],
-            "period_id": pop_data["period_id"],
-            "party_id": party_id,
-            "party_name": config["name"],
-            "party_full_name": config["full_name"],
-            "distance": distance,
-            "raw_score": score,
-            "strength": config["strength"],
-            "adjusted_score": score,  # Special parties don't get strength adjustment
-        }
-        special_entries.append(entry)
-
-    return special_entries
-
-
-def calculate_vote_percentages_and_votes(
-    voting_behavior: List[Dict[str, Any]], eligible_population: int
-) -> List[Dict[str, Any]]:
-    """Calculate percentages and vote counts for all voting behavior entries."""
-    total_score = sum(entry["adjusted_score"] for entry in voting_behavior)
-
-    for entry in voting_behavior:
-        percentage = (
-            (entry["adjusted_score"] / total_score * 100) if total_score > 0 else 0
-        )
-        entry["percentage"] = round(percentage, 2)
-        entry["votes"] = int((percentage / 100) * eligible_population)
-
-    # Sort by votes descending
-    voting_behavior.sort(key=lambda x: x["votes"], reverse=True)
-    return voting_behavior
-
-
 def get_voting_behavior(
-    db: Session, pop_period: Dict[str, Any]
+    db: Session,
+    pop_period: Dict[str, Any],
+    snapshot: Optional[PeriodSnapshot] = None,
 ) -> List[Dict[str, Any]]:
     """Calculate complete voting behavior for a population in a period."""
     pop_id = pop_period["pop_id"]
     period_id = pop_period["period_id"]
 
-    # Get reference models
-    pop = get_item(db, Pop, pop_id)
-    period = get_item(db, Period, period_id)
-    party_periods = get_items(db, PartyPeriod, filters={"period_id": period_id})
-
-    if not pop or not period:
+    if snapshot is None:
+        snapshot = load_period_snapshot(db, period_id)
+    pop_name = snapshot.pop_names.get(pop_id)
+    if pop_name is None:
         raise HTTPException(status_code=404, detail="Pop or Period not found")
 
-    # Calculate eligible population
-    pop_population = pop_period["pop_size"]
-    ratio_eligible = pop_period["ratio_eligible"]
-    eligible_population = int((pop_population * ratio_eligible) / 100) * 1000
-
-    # Add pop name to data
-    pop_data = {**pop_period, "pop_name": pop.name}
+    # Score this single pop against every party of the snapshot
+    pop_arrays = {
+        field: np.array([pop_period[field]], dtype=np.int64)
+        for field in POP_PERIOD_FIELDS
+    }
+    matrix = build_vote_matrix(pop_arrays, snapshot.party_arrays)
+    columns = {key: values[0].tolist() for key, values in matrix.items()}
 
-    # Create voting behavior entries for regular parties
     voting_behavior = []
-    for party_period in party_periods:
-        party = get_item(db, Party, party_period.party_id)
-        if not party:
-            continue
-
-        party_data = convert_sqlmodel_to_dict(
-            party_period,
-            ["social_orientation", "economic_orientation", "political_strength"],
+    party_ids = list(snapshot.party_ids) + list(SPECIAL_PARTY_COLUMNS)
+    for index, party_id in enumerate(party_ids):
+        if party_id in SPECIAL_PARTIES_CONFIG:
+            config = SPECIAL_PARTIES_CONFIG[party_id]
+            party_name, party_full_name = config["name"], config["full_name"]
+        else:
+            details = snapshot.party_details[party_id]
+            party_name, party_full_name = details["name"], details["full_name"]
+
+        voting_behavior.append(
+            {
+                "pop_id": pop_id,
+                "pop_name": pop_name,
+                "period_id": period_id,
+                "party_id": party_id,
+                "party_name": party_name,
+                "party_full_name": party_full_name,
+                "distance": columns["distance"][index],
+                "raw_score": columns["raw_score"][index],
+                "strength": columns["strength"][index],
+                "adjusted_score": columns["adjusted_score"][index],
+                "percentage": round(columns["percentage"][index], 2),
+                "votes": columns["votes"][index],
+            }
         )
 
-        party_info = {
-            "party_id": party_period.party_id,
-            "party_name": party.name,
-            "party_full_name": party.full_name,
-        }
-
-        entry = create_voting_entry(pop_data, party_data, party_info)
-        voting_behavior.append(entry)
-
-    # Add special parties (non-voters, small parties)
-    special_entries = add_special_parties_voting(pop_data)
-    voting_behavior.extend(special_entries)
-
-    # Calculate final percentages and votes
-    return calculate_vote_percentages_and_votes(voting_behavior, eligible_population)
+    # Sort by votes descending
+    voting_behavior.sort(key=lambda x: x["votes"], reverse=True)
+    return voting_behavior
 
 
-def upsert_pop_vote(db: Session, vote_data: Dict[str, Any]) -> None:
-    """Create or update a PopVote entry."""
-    existing_entries = get_items(
-        db,
-        PopVote,
-        filters={
-            "period_id": vote_data["period_id"],
-            "pop_id": vote_data["pop_id"],
-            "party_id": vote_data["party_id"],
-        },
-    )
+def compute_snapshot_votes(snapshot: PeriodSnapshot) -> np.ndarray:
+    """Calculate the pop x party votes matrix of a snapshot (see build_vote_matrix)."""
+    return build_vote_matrix(snapshot.pop_arrays, snapshot.party_arrays)["votes"]
 
-    if existing_entries:
-        update_item(db, existing_entries[0], vote_data)
-    else:
-        new_vote = PopVote(**vote_data)
-        create_item(db, new_vote)
 
+def create_pop_votes(
+    db: Session,
+    period_id: int,
+    commit: bool = True,
+    snapshot: Optional[PeriodSnapshot] = None,
+    votes: Optional[np.ndarray] = None,
+) -> None:
+    """
+    Create PopVotes for all populations in a period in a single bulk write.
 
-def create_pop_votes(db: Session, period_id: int) -> None:
-    """Create PopVotes for all populations in a period."""
-    pop_periods = get_items(db, PopPeriod, filters={"period_id": period_id})
-    if not pop_periods:
+    votes may carry a matrix already computed by compute_snapshot_votes.
+    """
+    if snapshot is None:
+        snapshot = load_period_snapshot(db, period_id)
+    if not snapshot.pop_ids:
         raise HTTPException(
             status_code=404,
             detail="No population data available for the selected period",
         )
 
-    for pop_period in pop_periods:
-        pop_period_dict = convert_sqlmodel_to_dict(
-            pop_period,
-            [
-                "pop_id",
-                "period_id",
-                "social_orientation",
-                "economic_orientation",
-                "max_political_distance",
-                "variety_tolerance",
-                "non_voters_distance",
-                "small_party_distance",
-                "ratio_eligible",
-                "pop_size",
-            ],
-        )
-
-        voting_behavior = get_voting_behavior(db, pop_period_dict)
+    if votes is None:
+        votes = compute_snapshot_votes(snapshot)
+    party_ids = list(snapshot.party_ids) + list(SPECIAL_PARTY_COLUMNS)
 
-        for entry in voting_behavior:
-            vote_data = {
-                "period_id": period_id,
-                "pop_id": pop_period.pop_id,
-                "party_id": entry["party_id"],
-                "votes": entry["votes"],
-            }
-            upsert_pop_vote(db, vote_data)
+    vote_rows = [
+        {
+            "period_id": period_id,
+            "pop_id": pop_id,
+            "party_id": party_id,
+            "votes": votes,
+        }
+        for pop_id, pop_votes in zip(snapshot.pop_ids, votes.tolist())
+        for party_id, votes in zip(party_ids, pop_votes)
+    ]
+    bulk_upsert_items(
+        db, PopVote, vote_rows, ["period_id", "pop_id", "party_id"], commit=commit
+    )
 
 
 def calculate_election_result_data(
@@ -273,75 +314,86 @@ def calculate_election_result_data(
     }
 
 
-def upsert_election_result(db: Session, result_data: Dict[str, Any]) -> None:
-    """Create or update an ElectionResult entry."""
-    existing_entries = get_items(
-        db,
-        ElectionResult,
-        filters={
-            "period_id": result_data["period_id"],
-            "party_id": result_data["party_id"],
-        },
+def get_party_votes_summary(db: Session, period_id: int) -> Dict[int, int]:
+    """Get total votes per party of a period, aggregated in the database."""
+    statement = (
+        select(PopVote.party_id, func.sum(PopVote.votes))
+        .where(PopVote.period_id == period_id)
+        .group_by(PopVote.party_id)
+        .order_by(PopVote.party_id)
     )
-
-    if existing_entries:
-        update_item(db, existing_entries[0], result_data)
-    else:
-        new_result = ElectionResult(**result_data)
-        create_item(db, new_result)
-
-
-def get_party_votes_summary(pop_votes: List[PopVote]) -> Dict[int, int]:
-    """Get total votes per party from PopVote entries."""
-    party_votes = {}
-    for vote in pop_votes:
-        if vote.party_id not in party_votes:
-            party_votes[vote.party_id] = 0
-        party_votes[vote.party_id] += vote.votes
-
-    # Filter out parties with zero votes
-    return {party_id: votes for party_id, votes in party_votes.items() if votes > 0}
+    return {party_id: votes for party_id, votes in db.exec(statement).all()}
 
 
 def create_election_results(
-    db: Session, period_id: int, seats: int, threshold: float
+    db: Session,
+    period_id: int,
+    seats: int,
+    threshold: float,
+    commit: bool = True,
+    method: ApportionmentMethod = "hare",
+    party_votes_summary: Optional[Dict[int, int]] = None,
 ) -> None:
-    """Create election results and calculate seats for a period."""
-    pop_votes = get_items(db, PopVote, filters={"period_id": period_id})
-    if not pop_votes:
+    """
+    Create election results and calculate seats for a period.
+
+    party_votes_summary may carry vote totals per party already known to the
+    caller; by default they are aggregated from the period's PopVotes.
+    """
+    if party_votes_summary is None:
+        party_votes_summary = get_party_votes_summary(db, period_id)
+    if not party_votes_summary:
         raise HTTPException(
             status_code=404,
             detail="No population voting data available for the selected period",
         )
 
-    sum_votes = sum(vote.votes for vote in pop_votes)
-    party_votes_summary = get_party_votes_summary(pop_votes)
+    sum_votes = sum(party_votes_summary.values())
 
+    result_rows = []
     for party_id, party_votes in party_votes_summary.items():
+        # Parties with zero votes get no result entry
+        if party_votes <= 0:
+            continue
         result_data = calculate_election_result_data(
             party_id, party_votes, sum_votes, threshold
         )
         result_data["period_id"] = period_id
-        upsert_election_result(db, result_data)
-
-    calculate_seats(db, period_id, seats)
+        result_rows.append(result_data)
 
+    bulk_upsert_items(
+        db, ElectionResult, result_rows, ["period_id", "party_id"], commit=False
+    )
 
-def allocate_residual_seats(
-    parliament_data: List[Dict[str, Any]], seats_left: int
-) -> None:
-    """Allocate remaining seats using largest remainder method."""
-    while seats_left > 0:
-        # Find party with highest residual seats
-        max_residual_party = max(parliament_data, key=lambda x: x["residual_seats"])
-        max_residual_party["seats"] += 1
-        max_residual_party["residual_seats"] -= 1
-        seats_left -= 1
+    # Results of parties that lost all their votes must not keep stale totals
+    zero_vote_party_ids = [
+        party_id for party_id, party_votes in party_votes_summary.items() if party_votes <= 0
+    ]
+    if zero_vote_party_ids:
+        db.exec(
+            update(ElectionResult)
+            .where(ElectionResult.period_id == period_id)
+            .where(ElectionResult.party_id.in_(zero_vote_party_ids))
+            .values(votes=0, percentage=0.0, seats=0, in_parliament=False, in_government=False)
+        )
+    with profile_stage("calculate_seats"):
+        calculate_seats(db, period_id, seats, commit=commit, method=method)
 
 
-def calculate_seats(db: Session, period_id: int, seats: int) -> None:
-    """Calculate seat allocation using largest remainder method."""
-    election_results = get_items(db, ElectionResult, filters={"period_id": period_id})
+def calculate_seats(
+    db: Session,
+    period_id: int,
+    seats: int,
+    commit: bool = True,
+    method: ApportionmentMethod = "hare",
+) -> None:
+    """Calculate seat allocation for parties in parliament (largest remainder by default)."""
+    # Refresh rows already in the session: they may predate a bulk upsert
+    election_results = db.exec(
+        select(ElectionResult)
+        .where(ElectionResult.period_id == period_id)
+        .execution_options(populate_existing=True)
+    ).all()
     if not election_results:
         raise HTTPException(
             status_code=404,
@@ -356,38 +408,83 @@ def calculate_seats(db: Session, period_id: int, seats: int) -> None:
         )
 
     # Calculate seat allocation
-    total_votes = sum(result.votes for result in parliament)
-    seats_left_to_allocate = seats
-    parliament_data = []
-
-    # Calculate minimum seats and residuals for each party
-    for result in parliament:
-        relative_votes = result.votes / total_votes if total_votes > 0 else 0
-        exact_seats = relative_votes * seats
-        min_seats = int(exact_seats)
-        residual_seats = exact_seats - min_seats
-
-        party_data = {
-            "result": result,
-            "residual_seats": residual_seats,
-            "seats": min_seats,
-        }
-        parliament_data.append(party_data)
-        seats_left_to_allocate -= min_seats
+    allocated_seats = apportion([result.votes for result in parliament], seats, method)
 
-    # Allocate residual seats
-    allocate_residual_seats(parliament_data, seats_left_to_allocate)
+    # Update database with final seat counts; parties not in parliament get 0 seats
+    seat_rows = [
+        {"id": result.id, "seats": party_seats}
+        for result, party_seats in zip(parliament, allocated_seats)
+    ]
+    seat_rows.extend(
+        {"id": result.id, "seats": 0}
+        for result in election_results
+        if not result.in_parliament
+    )
+    bulk_update_items(db, ElectionResult, seat_rows, commit=commit)
+
+
+def sweep_election_parameters(
+    db: Session,
+    period_id: int,
+    seats_grid: List[int],
+    threshold_grid: List[float],
+    method: ApportionmentMethod = "hare",
+) -> Dict[str, Any]:
+    """
+    Calculate seats for every seats/threshold combination from the stored vote totals.
+
+    Party totals are aggregated once; nothing is written to the database.
+    in_parliament[t][p] tells whether party p passes threshold_grid[t] and
+    allocations[t][s][p] holds its seats for threshold_grid[t] and seats_grid[s].
+    """
+    if not seats_grid or not threshold_grid:
+        raise HTTPException(
+            status_code=400, detail="At least one seats and one threshold value are required"
+        )
+    if any(seats < 0 for seats in seats_grid):
+        raise HTTPException(status_code=400, detail="Number of seats must not be negative")
+
+    party_votes_summary = get_party_votes_summary(db, period_id)
+    # Parties with zero votes get no result entry, as in create_election_results
+    party_votes = {
+        party_id: votes for party_id, votes in party_votes_summary.items() if votes > 0
+    }
+    if not party_votes:
+        raise HTTPException(
+            status_code=404,
+            detail="No population voting data available for the selected period",
+        )
 
-    # Update database with final seat counts
-    for party_data in parliament_data:
-        update_data = {"seats": party_data["seats"]}
-        update_item(db, party_data["result"], update_data)
-    
-    # Ensure parties not in parliament have 0 seats
-    parties_not_in_parliament = [result for result in election_results if not result.in_parliament]
-    for result in parties_not_in_parliament:
-        update_data = {"seats": 0}
-        update_item(db, result, update_data)
+    party_ids = np.array(list(party_votes))
+    votes = np.array(list(party_votes.values()), dtype=np.int64)
+    percentage = votes / votes.sum() * 100
+
+    # Same threshold rule as calculate_election_result_data, one row per threshold
+    in_parliament = (percentage >= np.array(threshold_grid)[:, None]) & (party_ids > 0)
+    parliament_votes = np.where(in_parliament, votes, 0)
+    allocations = np.stack(
+        [apportion_trials(parliament_votes, seats, method) for seats in seats_grid],
+        axis=1,
+    )
+    # Thresholds that nobody passes leave the parliament empty
+    allocations[~in_parliament.any(axis=-1)] = 0
+
+    return {
+        "period_id": period_id,
+        "method": method,
+        "seats": list(seats_grid),
+        "thresholds": list(threshold_grid),
+        "parties": [
+            {
+                "party_id": int(party_id),
+                "votes": int(party_votes),
+                "percentage": round(float(party_percentage), 2),
+            }
+            for party_id, party_votes, party_percentage in zip(party_ids, votes, percentage)
+        ],
+        "in_parliament": in_parliament.tolist(),
+        "allocations": allocations.tolist(),
+    }
 
 
 def get_distance_scoring_curve(pop_period: Dict[str, Any]) -> List[Dict[str, Any]]:
@@ -405,26 +502,27 @@ def get_distance_scoring_curve(pop_period: Dict[str, Any]) -> List[Dict[str, Any
     ]
 
 
-def validate_simulation_prerequisites(db: Session, period_id: int) -> None:
-    """Validate that all necessary data exists for simulation."""
-    period = get_item(db, Period, period_id)
-    if not period:
-        raise HTTPException(status_code=404, detail=f"Period {period_id} not found")
+def validate_simulation_prerequisites(
+    db: Session, period_id: int, snapshot: Optional[PeriodSnapshot] = None
+) -> PeriodSnapshot:
+    """Validate that all necessary data exists for simulation and return the period snapshot."""
+    if snapshot is None:
+        snapshot = load_period_snapshot(db, period_id)
 
-    pop_periods = get_items(db, PopPeriod, filters={"period_id": period_id})
-    if not pop_periods:
+    if not snapshot.pop_ids:
         raise HTTPException(
             status_code=400,
             detail=f"No PopPeriod data found for period {period_id}. Cannot simulate without population data.",
         )
 
-    party_periods = get_items(db, PartyPeriod, filters={"period_id": period_id})
-    if not party_periods:
+    if not snapshot.party_ids:
         raise HTTPException(
             status_code=400,
             detail=f"No PartyPeriod data found for period {period_id}. Cannot simulate without party data.",
         )
 
+    return snapshot
+
 
 def gather_simulation_statistics(db: Session, period_id: int) -> Dict[str, Any]:
     """Gather statistics about the simulation results."""
@@ -445,8 +543,35 @@ def gather_simulation_statistics(db: Session, period_id: int) -> Dict[str, Any]:
     }
 
 
+def build_simulation_response(
+    period_id: int,
+    seats: int,
+    threshold: float,
+    method: ApportionmentMethod,
+    statistics: Dict[str, Any],
+    run_profile: Optional[SimulationProfile] = None,
+) -> Dict[str, Any]:
+    """Response of a complete simulation run, with its profile if one was recorded."""
+    response = {
+        "success": True,
+        "message": f"Complete simulation finished for period {period_id}",
+        "period_id": period_id,
+        "parameters": {"seats": seats, "threshold": threshold, "method": method},
+        "statistics": statistics,
+    }
+    if run_profile is not None:
+        response["profile"] = run_profile.to_dict()
+    return response
+
+
 def run_complete_simulation(
-    db: Session, period_id: int, seats: int, threshold: float
+    db: Session,
+    period_id: int,
+    seats: int,
+    threshold: float,
+    method: ApportionmentMethod = "hare",
+    profile: bool = False,
+    sampling_profile: bool = False,
 ) -> Dict[str, Any]:
     """
     Run complete election simulation for a period.
@@ -456,21 +581,420 @@ def run_complete_simulation(
     2. Creates PopVotes based on voting behavior calculations
     3. Creates ElectionResults with seat allocation
     4. Returns comprehensive simulation statistics
+
+    With profile, the response also holds the timings, SQL statements and rows
+    written per stage; sampling_profile additionally writes a sampling profile
+    of the run to a file (see profiling.simulation_profile).
     """
-    validate_simulation_prerequisites(db, period_id)
+    with simulation_profile(
+        profile or sampling_profile, sampling_profile, f"simulation_period_{period_id}"
+    ) as run_profile:
+        with profile_stage("validate_simulation_prerequisites"):
+            snapshot = validate_simulation_prerequisites(db, period_id)
+
+        # Execute simulation steps; votes and results are committed together
+        with profile_stage("create_pop_votes"):
+            create_pop_votes(db, period_id, commit=False, snapshot=snapshot)
+        with profile_stage("create_election_results"):
+            create_election_results(db, period_id, seats, threshold, method=method)
+
+        with profile_stage("gather_simulation_statistics"):
+            statistics = gather_simulation_statistics(db, period_id)
+
+    return build_simulation_response(period_id, seats, threshold, method, statistics, run_profile)
+
+
+def get_stored_pop_votes(
+    db: Session, period_id: int, pop_id: Optional[int] = None
+) -> Dict[tuple, int]:
+    """Get the stored votes of a period (optionally of one pop) keyed by (pop_id, party_id)."""
+    statement = select(PopVote.pop_id, PopVote.party_id, PopVote.votes).where(
+        PopVote.period_id == period_id
+    )
+    if pop_id is not None:
+        statement = statement.where(PopVote.pop_id == pop_id)
+    return {
+        (vote_pop_id, party_id): votes
+        for vote_pop_id, party_id, votes in db.exec(statement).all()
+    }
 
-    # Execute simulation steps
-    create_pop_votes(db, period_id)
-    create_election_results(db, period_id, seats, threshold)
 
-    statistics = gather_simulation_statistics(db, period_id)
+def run_incremental_simulation(
+    db: Session,
+    period_id: int,
+    seats: int,
+    threshold: float,
+    method: ApportionmentMethod = "hare",
+    pop_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Re-simulate a simulated period after a PopPeriod or PartyPeriod edit.
+
+    With pop_id only that pop's row of the vote matrix is rescored, otherwise
+    the whole matrix (a party's strength and position enter every pop's share).
+    Only PopVotes whose votes changed are written, the stored ElectionResult
+    totals are patched by the differences and seats are reallocated. Periods
+    without election results get a complete simulation instead.
+    """
+    election_results = db.exec(
+        select(ElectionResult.party_id, ElectionResult.votes).where(
+            ElectionResult.period_id == period_id
+        )
+    ).all()
+    if not election_results:
+        return run_complete_simulation(db, period_id, seats, threshold, method)
+
+    snapshot = load_period_snapshot(db, period_id, pop_id)
+    votes = compute_snapshot_votes(snapshot)
+    stored_votes = get_stored_pop_votes(db, period_id, pop_id)
+    party_ids = list(snapshot.party_ids) + list(SPECIAL_PARTY_COLUMNS)
+
+    changed_rows = []
+    party_votes_summary = {party_id: party_votes for party_id, party_votes in election_results}
+    for vote_pop_id, pop_votes in zip(snapshot.pop_ids, votes.tolist()):
+        for party_id, party_votes in zip(party_ids, pop_votes):
+            previous_votes = stored_votes.get((vote_pop_id, party_id))
+            if previous_votes == party_votes:
+                continue
+            changed_rows.append(
+                {
+                    "period_id": period_id,
+                    "pop_id": vote_pop_id,
+                    "party_id": party_id,
+                    "votes": party_votes,
+                }
+            )
+            party_votes_summary[party_id] = (
+                party_votes_summary.get(party_id, 0) + party_votes - (previous_votes or 0)
+            )
+
+    # Votes and results are committed together
+    bulk_upsert_items(
+        db, PopVote, changed_rows, ["period_id", "pop_id", "party_id"], commit=False
+    )
+    create_election_results(
+        db,
+        period_id,
+        seats,
+        threshold,
+        method=method,
+        party_votes_summary=party_votes_summary,
+    )
 
     return {
         "success": True,
-        "message": f"Complete simulation finished for period {period_id}",
+        "message": f"Incremental simulation finished for period {period_id}",
         "period_id": period_id,
-        "parameters": {"seats": seats, "threshold": threshold},
-        "statistics": statistics,
+        "parameters": {"seats": seats, "threshold": threshold, "method": method},
+        "rescored_pops": len(snapshot.pop_ids),
+        "changed_pop_votes": len(changed_rows),
+    }
+
+
+def parse_override_value(field: str, value: Any) -> int:
+    """Check an override is a whole number within FIELD_RANGES; 400 otherwise."""
+    low, high = FIELD_RANGES[field]
+    try:
+        # Booleans and fractional numbers are not silently converted
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError
+        number = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise HTTPException(
+            status_code=400, detail=f"Invalid value for '{field}': {value}"
+        )
+    if not low <= number <= high:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Value for '{field}' must be between {low} and {high}: {value}",
+        )
+    return number
+
+
+def apply_parameter_overrides(
+    ids: tuple,
+    arrays: Dict[str, np.ndarray],
+    overrides: List[Dict[str, Any]],
+    id_field: str,
+    fields: List[str],
+) -> Dict[str, np.ndarray]:
+    """Return copies of snapshot arrays with the given rows' fields replaced."""
+    arrays = {field: values.copy() for field, values in arrays.items()}
+    for override in overrides:
+        if override.get(id_field) not in ids:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No data for {id_field} {override.get(id_field)} in this period",
+            )
+        index = ids.index(override[id_field])
+        for field, value in override.items():
+            if field == id_field:
+                continue
+            if field not in fields:
+                raise HTTPException(
+                    status_code=400, detail=f"Field '{field}' cannot be overridden"
+                )
+            arrays[field][index] = parse_override_value(field, value)
+    for values in arrays.values():
+        values.setflags(write=False)
+    return arrays
+
+
+def preview_simulation(
+    db: Session,
+    period_id: int,
+    seats: int,
+    threshold: float,
+    method: ApportionmentMethod = "hare",
+    pop_periods: Optional[List[Dict[str, Any]]] = None,
+    party_periods: Optional[List[Dict[str, Any]]] = None,
+    max_parties: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Simulate a period with modified parameters without writing to the database.
+
+    pop_periods and party_periods hold partial PopPeriod/PartyPeriod rows
+    identified by pop_id/party_id; their fields replace the stored values.
+    Results match what run_complete_simulation would store for the same data.
+    """
+    snapshot = validate_simulation_prerequisites(db, period_id)
+    pop_fields = [
+        field for field in POP_PERIOD_FIELDS if field not in ("pop_id", "period_id")
+    ]
+    party_fields = [field for field in PARTY_PERIOD_FIELDS if field != "party_id"]
+    snapshot = replace(
+        snapshot,
+        pop_arrays=apply_parameter_overrides(
+            snapshot.pop_ids, snapshot.pop_arrays, pop_periods or [], "pop_id", pop_fields
+        ),
+        party_arrays=apply_parameter_overrides(
+            snapshot.party_ids,
+            snapshot.party_arrays,
+            party_periods or [],
+            "party_id",
+            party_fields,
+        ),
+    )
+
+    # Same steps as create_pop_votes and create_election_results, in memory
+    party_ids = list(snapshot.party_ids) + list(SPECIAL_PARTY_COLUMNS)
+    party_totals = compute_snapshot_votes(snapshot).sum(axis=0).tolist()
+    party_votes_summary = dict(sorted(zip(party_ids, party_totals)))
+    sum_votes = sum(party_votes_summary.values())
+
+    election_results = []
+    for party_id, party_votes in party_votes_summary.items():
+        if party_votes <= 0:
+            continue
+        result_data = calculate_election_result_data(
+            party_id, party_votes, sum_votes, threshold
+        )
+        result_data["period_id"] = period_id
+        election_results.append(ElectionResult(**result_data))
+
+    parliament = [result for result in election_results if result.in_parliament]
+    if not parliament:
+        raise HTTPException(
+            status_code=404, detail="No parties in parliament for the selected period"
+        )
+    for result, party_seats in zip(
+        parliament, apportion([result.votes for result in parliament], seats, method)
+    ):
+        result.seats = party_seats
+
+    results = []
+    for result in election_results:
+        details = snapshot.get_party_details(result.party_id) or {
+            "name": SPECIAL_PARTIES_CONFIG[result.party_id]["name"],
+            "full_name": SPECIAL_PARTIES_CONFIG[result.party_id]["full_name"],
+            "color": None,
+        }
+        results.append(
+            {
+                "party_id": result.party_id,
+                **details,
+                "votes": result.votes,
+                "percentage": result.percentage,
+                "seats": result.seats,
+                "in_parliament": result.in_parliament,
+            }
+        )
+
+    parties_with_seats = [
+        result
+        for result in election_results
+        if result.seats > 0 and result.party_id > 0
+    ]
+    return {
+        "period_id": period_id,
+        "parameters": {"seats": seats, "threshold": threshold, "method": method},
+        "results": results,
+        "coalitions": build_coalitions(parties_with_seats, snapshot, max_parties),
+    }
+
+
+def get_simulation_workers() -> int:
+    """Number of worker processes for batch scoring (SIMULATION_WORKERS, default: CPU count)."""
+    return int(os.getenv("SIMULATION_WORKERS", os.cpu_count() or 1))
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Return the shared worker pool for CPU-bound scoring, creating it on first use.
+
+    Workers are not forked from the server, whose threads (threadpool, async
+    driver, connection pool locks) could leave a child deadlocked; they start
+    from a fork server, or are spawned where that is unavailable.
+    """
+    global process_pool
+    with process_pool_lock:
+        if process_pool is None:
+            start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            process_pool = ProcessPoolExecutor(
+                max_workers=get_simulation_workers(),
+                mp_context=multiprocessing.get_context(start_method),
+            )
+        return process_pool
+
+
+def shutdown_process_pool() -> None:
+    """Stop the shared worker pool, if it was started."""
+    global process_pool
+    with process_pool_lock:
+        if process_pool is not None:
+            process_pool.shutdown()
+            process_pool = None
+
+
+async def run_scoring_in_executor(function, *args):
+    """Run CPU-bound scoring off the event loop: in the worker pool, or a thread with one worker."""
+    executor = get_process_pool() if get_simulation_workers() > 1 else None
+    return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+
+async def create_pop_votes_async(db: AsyncSession, period_id: int) -> None:
+    """Async create_pop_votes: the database work awaits, the scoring runs in an executor."""
+    snapshot = await db.run_sync(load_period_snapshot, period_id)
+    if not snapshot.pop_ids:
+        raise HTTPException(
+            status_code=404,
+            detail="No population data available for the selected period",
+        )
+    votes = await run_scoring_in_executor(compute_snapshot_votes, snapshot)
+    await db.run_sync(create_pop_votes, period_id, snapshot=snapshot, votes=votes)
+
+
+async def run_complete_simulation_async(
+    db: AsyncSession,
+    period_id: int,
+    seats: int,
+    threshold: float,
+    method: ApportionmentMethod = "hare",
+    profile: bool = False,
+    sampling_profile: bool = False,
+) -> Dict[str, Any]:
+    """Async run_complete_simulation: the database work awaits, the scoring runs in an executor."""
+    with simulation_profile(
+        profile or sampling_profile, sampling_profile, f"simulation_period_{period_id}"
+    ) as run_profile:
+        with profile_stage("validate_simulation_prerequisites"):
+            snapshot = await db.run_sync(validate_simulation_prerequisites, period_id)
+
+        # Votes and results are committed together
+        with profile_stage("create_pop_votes"):
+            votes = await run_scoring_in_executor(compute_snapshot_votes, snapshot)
+            await db.run_sync(
+                create_pop_votes, period_id, commit=False, snapshot=snapshot, votes=votes
+            )
+        with profile_stage("create_election_results"):
+            await db.run_sync(
+                create_election_results, period_id, seats, threshold, method=method
+            )
+
+        with profile_stage("gather_simulation_statistics"):
+            statistics = await db.run_sync(gather_simulation_statistics, period_id)
+
+    return build_simulation_response(period_id, seats, threshold, method, statistics, run_profile)
+
+
+def get_batch_period_ids(
+    db: Session,
+    period_ids: Optional[List[int]] = None,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+) -> List[int]:
+    """Resolve explicit period ids and/or an inclusive year range to period ids ordered by year."""
+    statement = select(Period.id).order_by(Period.year)
+    if period_ids is not None:
+        statement = statement.where(Period.id.in_(period_ids))
+    if start_year is not None:
+        statement = statement.where(Period.year >= start_year)
+    if end_year is not None:
+        statement = statement.where(Period.year <= end_year)
+
+    found_ids = db.exec(statement).all()
+    missing_ids = set(period_ids or []) - set(found_ids)
+    if missing_ids:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Periods not found: {', '.join(str(id) for id in sorted(missing_ids))}",
+        )
+    if not found_ids:
+        raise HTTPException(status_code=404, detail="No periods match the selection")
+    return found_ids
+
+
+def run_batch_simulation(
+    db: Session,
+    period_ids: List[int],
+    seats: int,
+    threshold: float,
+    method: ApportionmentMethod = "hare",
+) -> Dict[str, Any]:
+    """
+    Run complete election simulations for several periods at once.
+
+    Every period's snapshot is loaded and validated first, the vote matrices are
+    scored in parallel on the process pool, and all PopVotes and ElectionResults
+    are written in a single transaction. Results match run_complete_simulation.
+    """
+    snapshots = [
+        validate_simulation_prerequisites(db, period_id) for period_id in period_ids
+    ]
+
+    # Score periods in parallel; a single period is not worth the pickling overhead
+    if len(snapshots) > 1 and get_simulation_workers() > 1:
+        period_votes = list(get_process_pool().map(compute_snapshot_votes, snapshots))
+    else:
+        period_votes = [compute_snapshot_votes(snapshot) for snapshot in snapshots]
+
+    try:
+        for snapshot, votes in zip(snapshots, period_votes):
+            create_pop_votes(
+                db, snapshot.period_id, commit=False, snapshot=snapshot, votes=votes
+            )
+            create_election_results(
+                db, snapshot.period_id, seats, threshold, commit=False, method=method
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    periods = [
+        {
+            "period_id": snapshot.period_id,
+            "year": snapshot.year,
+            "statistics": gather_simulation_statistics(db, snapshot.period_id),
+        }
+        for snapshot in snapshots
+    ]
+
+    return {
+        "success": True,
+        "message": f"Batch simulation finished for {len(periods)} periods",
+        "parameters": {"seats": seats, "threshold": threshold, "method": method},
+        "periods": periods,
     }
 
 
@@ -503,32 +1027,20 @@ def calculate_average_coalition_distance(
 
 
 def get_party_details_and_orientations(
-    db: Session, period_id: int, parties_with_seats: List
+    snapshot: PeriodSnapshot, parties_with_seats: List
 ) -> tuple[Dict, Dict]:
     """Get party details and political orientations for coalition analysis."""
     party_details = {}
     party_orientations = {}
 
     for result in parties_with_seats:
-        party = get_item(db, Party, result.party_id)
-        if party:
-            party_details[result.party_id] = {
-                "name": party.name,
-                "full_name": party.full_name,
-                "color": party.color,
-            }
+        details = snapshot.get_party_details(result.party_id)
+        if details:
+            party_details[result.party_id] = details
 
-        party_periods = get_items(
-            db,
-            PartyPeriod,
-            filters={"period_id": period_id, "party_id": result.party_id},
-        )
-        if party_periods:
-            party_period = party_periods[0]
-            party_orientations[result.party_id] = {
-                "social_orientation": party_period.social_orientation,
-                "economic_orientation": party_period.economic_orientation,
-            }
+        orientation = snapshot.get_party_orientation(result.party_id)
+        if orientation:
+            party_orientations[result.party_id] = orientation
 
     return party_details, party_orientations
 
@@ -592,8 +1104,69 @@ def create_coalition_data(
     }
 
 
-def getCoalitions(db: Session, period_id: int) -> List[Dict[str, Any]]:
-    """Find all minimal coalitions that have a majority of seats for a given period."""
+def find_minimal_winning_coalitions(
+    seats: List[int], majority_threshold: int, max_parties: Optional[int] = None
+) -> List[tuple]:
+    """
+    Find every minimal winning coalition as a tuple of indices into seats.
+
+    A coalition is minimal if dropping any member loses the majority. Parties
+    are explored in descending seat order, so the party that pushes a coalition
+    over the threshold is its smallest member: every coalition crossing the
+    threshold is minimal and is never extended further. Branches are cut as
+    soon as the remaining parties (or the max_parties largest of them) can no
+    longer reach the threshold. Seat counts must be positive.
+    """
+    order = sorted(range(len(seats)), key=lambda index: seats[index], reverse=True)
+    sorted_seats = [seats[index] for index in order]
+    max_size = len(seats) if max_parties is None else max_parties
+
+    # prefix_sums[j] = seats of the j largest parties
+    prefix_sums = [0]
+    for party_seats in sorted_seats:
+        prefix_sums.append(prefix_sums[-1] + party_seats)
+
+    coalitions = []
+    members = []
+
+    def extend(start: int, coalition_seats: int) -> None:
+        slots_left = max_size - len(members)
+        for position in range(start, len(sorted_seats)):
+            # The largest reachable total from here uses the next parties in line
+            best_total = coalition_seats + (
+                prefix_sums[min(position + slots_left, len(sorted_seats))]
+                - prefix_sums[position]
+            )
+            if best_total < majority_threshold:
+                break
+
+            members.append(position)
+            new_seats = coalition_seats + sorted_seats[position]
+            if new_seats >= majority_threshold:
+                coalitions.append(tuple(sorted(order[member] for member in members)))
+            elif slots_left > 1:
+                extend(position + 1, new_seats)
+            members.pop()
+
+    if max_size > 0:
+        extend(0, 0)
+
+    # Same order as enumerating combinations by size
+    coalitions.sort(key=lambda coalition: (len(coalition), coalition))
+    return coalitions
+
+
+def getCoalitions(
+    db: Session,
+    period_id: int,
+    snapshot: Optional[PeriodSnapshot] = None,
+    max_parties: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Find all minimal coalitions that have a majority of seats for a given period.
+
+    max_parties optionally limits the number of parties per coalition.
+    """
     election_results = get_items(db, ElectionResult, filters={"period_id": period_id})
     if not election_results:
         raise HTTPException(
@@ -612,48 +1185,57 @@ def getCoalitions(db: Session, period_id: int) -> List[Dict[str, Any]]:
             detail=f"No parties with seats found for period {period_id}",
         )
 
+    if snapshot is None:
+        snapshot = load_period_snapshot(db, period_id)
+    return build_coalitions(parties_with_seats, snapshot, max_parties)
+
+
+def build_coalitions(
+    parties_with_seats: List[ElectionResult],
+    snapshot: PeriodSnapshot,
+    max_parties: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Build the minimal majority coalitions of parties with seats, sorted by size and distance.
+
+    Parties are ordered by seats (descending), then party_id, so coalition ids,
+    the party order within a coalition and its name don't depend on row order.
+    """
+    parties_with_seats = sorted(
+        parties_with_seats, key=lambda result: (-result.seats, result.party_id)
+    )
+
     # Calculate majority threshold
     total_seats = sum(result.seats for result in parties_with_seats)
     majority_threshold = total_seats // 2 + 1
 
     # Get party details and orientations
     party_details, party_orientations = get_party_details_and_orientations(
-        db, period_id, parties_with_seats
+        snapshot, parties_with_seats
     )
 
     coalitions = []
-    minimal_coalition_party_sets = []
-
-    # Generate combinations starting with smallest size first
-    for size in range(1, len(parties_with_seats) + 1):
-        for combination in combinations(parties_with_seats, size):
-            coalition_seats = sum(party.seats for party in combination)
-
-            # Check if coalition has majority
-            if coalition_seats >= majority_threshold:
-                current_party_ids = set(party.party_id for party in combination)
-
-                # Check if this coalition is a superset of any existing minimal coalition
-                is_superset = any(
-                    minimal_set.issubset(current_party_ids)
-                    and minimal_set != current_party_ids
-                    for minimal_set in minimal_coalition_party_sets
-                )
+    minimal_coalitions = find_minimal_winning_coalitions(
+        [result.seats for result in parties_with_seats],
+        majority_threshold,
+        max_parties,
+    )
+
+    for indices in minimal_coalitions:
+        combination = tuple(parties_with_seats[index] for index in indices)
+        coalition_seats = sum(party.seats for party in combination)
+
+        coalition = create_coalition_data(
+            combination,
+            party_details,
+            party_orientations,
+            len(coalitions) + 1,
+        )
+        coalition["majority_margin"] = (
+            coalition_seats - majority_threshold + 1
+        )  # Fix the calculation
 
-                # Only add if it's not a superset of an existing minimal coalition
-                if not is_superset:
-                    coalition = create_coalition_data(
-                        combination,
-                        party_details,
-                        party_orientations,
-                        len(coalitions) + 1,
-                    )
-                    coalition["majority_margin"] = (
-                        coalition_seats - majority_threshold + 1
-                    )  # Fix the calculation
-
-                    coalitions.append(coalition)
-                    minimal_coalition_party_sets.append(current_party_ids)
+        coalitions.append(coalition)
 
     # Sort coalitions first by party count (ascending), then by average distance (ascending)
     coalitions.sort(key=lambda x: (x["party_count"], x["average_distance"]))
@@ -0,0 +1,208 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException
+from sqlmodel import Session, select
+from sqlalchemy.exc import SQLAlchemyError
+from models import Period, Pop, PopPeriod, Party, PartyPeriod
+
+
+POP_PERIOD_FIELDS = [
+    "pop_id",
+    "period_id",
+    "social_orientation",
+    "economic_orientation",
+    "max_political_distance",
+    "variety_tolerance",
+    "non_voters_distance",
+    "small_party_distance",
+    "ratio_eligible",
+    "pop_size",
+]
+PARTY_PERIOD_FIELDS = [
+    "party_id",
+    "social_orientation",
+    "economic_orientation",
+    "political_strength",
+]
+PARTY_DETAIL_FIELDS = ["name", "full_name", "color"]
+
+# Allowed values of the editable PopPeriod and PartyPeriod parameters
+# (the limits of the Period Data editor, see frontend fieldMeta.ts)
+ORIENTATION_RANGE = (-100, 100)
+PARAMETER_RANGE = (0, 100)
+FIELD_RANGES = {
+    "social_orientation": ORIENTATION_RANGE,
+    "economic_orientation": ORIENTATION_RANGE,
+    "pop_size": PARAMETER_RANGE,
+    "max_political_distance": PARAMETER_RANGE,
+    "variety_tolerance": PARAMETER_RANGE,
+    "non_voters_distance": PARAMETER_RANGE,
+    "small_party_distance": PARAMETER_RANGE,
+    "ratio_eligible": PARAMETER_RANGE,
+    "political_strength": PARAMETER_RANGE,
+}
+
+
+def to_field_arrays(objs: List[Any], fields: List[str]) -> Dict[str, np.ndarray]:
+    """Convert a list of SQLModel objects to one read-only int64 array per field."""
+    arrays = {}
+    for field in fields:
+        array = np.array([getattr(obj, field) for obj in objs], dtype=np.int64)
+        array.setflags(write=False)
+        arrays[field] = array
+    return arrays
+
+
+@dataclass(frozen=True)
+class PeriodSnapshot:
+    """
+    Immutable in-memory copy of the data a period's simulation reads.
+
+    PopPeriods and PartyPeriods are stored column-wise as read-only arrays
+    (see POP_PERIOD_FIELDS and PARTY_PERIOD_FIELDS), ordered by their id.
+    Only rows whose Pop or Party still exists are included.
+    """
+
+    period_id: int
+    year: int
+    pop_period_ids: Tuple[int, ...]
+    pop_ids: Tuple[int, ...]
+    pop_names: Dict[int, str]
+    pop_arrays: Dict[str, np.ndarray]
+    party_period_ids: Tuple[int, ...]
+    party_ids: Tuple[int, ...]
+    party_details: Dict[int, Dict[str, Any]]
+    party_arrays: Dict[str, np.ndarray]
+
+    def get_pop_period(self, pop_id: int) -> Optional[Dict[str, Any]]:
+        """Return the PopPeriod parameters of a pop as a dict, or None if absent."""
+        if pop_id not in self.pop_names:
+            return None
+        index = self.pop_ids.index(pop_id)
+        pop_period = {
+            field: int(self.pop_arrays[field][index]) for field in POP_PERIOD_FIELDS
+        }
+        pop_period["id"] = self.pop_period_ids[index]
+        return pop_period
+
+    def get_party_details(self, party_id: int) -> Optional[Dict[str, Any]]:
+        """Return name, full_name and color of a party, or None if absent."""
+        details = self.party_details.get(party_id)
+        return dict(details) if details is not None else None
+
+    def get_party_orientation(self, party_id: int) -> Optional[Dict[str, int]]:
+        """Return the social and economic orientation of a party, or None if absent."""
+        if party_id not in self.party_details:
+            return None
+        index = self.party_ids.index(party_id)
+        return {
+            "social_orientation": int(self.party_arrays["social_orientation"][index]),
+            "economic_orientation": int(
+                self.party_arrays["economic_orientation"][index]
+            ),
+        }
+
+
+def build_snapshot(period: Period, pop_rows: List[Tuple[PopPeriod, Pop]], party_rows: List[Tuple[PartyPeriod, Party]]) -> PeriodSnapshot:
+    """Build a PeriodSnapshot from (PopPeriod, Pop) and (PartyPeriod, Party) rows ordered by id."""
+    pop_periods = [pop_period for pop_period, _ in pop_rows]
+    party_periods = [party_period for party_period, _ in party_rows]
+
+    return PeriodSnapshot(
+        period_id=period.id,
+        year=period.year,
+        pop_period_ids=tuple(pop_period.id for pop_period in pop_periods),
+        pop_ids=tuple(pop_period.pop_id for pop_period in pop_periods),
+        pop_names={pop.id: pop.name for _, pop in pop_rows},
+        pop_arrays=to_field_arrays(pop_periods, POP_PERIOD_FIELDS),
+        party_period_ids=tuple(party_period.id for party_period in party_periods),
+        party_ids=tuple(party_period.party_id for party_period in party_periods),
+        party_details={
+            party.id: {field: getattr(party, field) for field in PARTY_DETAIL_FIELDS}
+            for _, party in party_rows
+        },
+        party_arrays=to_field_arrays(party_periods, PARTY_PERIOD_FIELDS),
+    )
+
+
+def load_period_snapshots(
+    db: Session, period_ids: Iterable[int], pop_id: Optional[int] = None
+) -> Dict[int, PeriodSnapshot]:
+    """
+    Load the snapshots of several periods with three queries in total.
+
+    Periods that do not exist are left out. pop_id optionally restricts every
+    snapshot to that single pop.
+    """
+    period_ids = list(period_ids)
+    if not period_ids:
+        return {}
+    try:
+        periods = db.exec(select(Period).where(Period.id.in_(period_ids))).all()
+
+        pop_statement = (
+            select(PopPeriod, Pop)
+            .join(Pop, PopPeriod.pop_id == Pop.id)
+            .where(PopPeriod.period_id.in_(period_ids))
+            .order_by(PopPeriod.id)
+        )
+        if pop_id is not None:
+            pop_statement = pop_statement.where(PopPeriod.pop_id == pop_id)
+        pop_rows = db.exec(pop_statement).all()
+        party_rows = db.exec(
+            select(PartyPeriod, Party)
+            .join(Party, PartyPeriod.party_id == Party.id)
+            .where(PartyPeriod.period_id.in_(period_ids))
+            .order_by(PartyPeriod.id)
+        ).all()
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    pop_rows_by_period: Dict[int, list] = {period.id: [] for period in periods}
+    for pop_period, pop in pop_rows:
+        pop_rows_by_period[pop_period.period_id].append((pop_period, pop))
+    party_rows_by_period: Dict[int, list] = {period.id: [] for period in periods}
+    for party_period, party in party_rows:
+        party_rows_by_period[party_period.period_id].append((party_period, party))
+
+    return {
+        period.id: build_snapshot(period, pop_rows_by_period[period.id], party_rows_by_period[period.id])
+        for period in periods
+    }
+
+
+def load_period_snapshot(
+    db: Session, period_id: int, pop_id: Optional[int] = None
+) -> PeriodSnapshot:
+    """
+    Load a period's Pops, Parties, PopPeriods and PartyPeriods with three queries.
+
+    pop_id optionally restricts the snapshot to that single pop.
+    """
+    try:
+        period = db.get(Period, period_id)
+        if not period:
+            raise HTTPException(status_code=404, detail=f"Period {period_id} not found")
+
+        pop_statement = (
+            select(PopPeriod, Pop)
+            .join(Pop, PopPeriod.pop_id == Pop.id)
+            .where(PopPeriod.period_id == period_id)
+            .order_by(PopPeriod.id)
+        )
+        if pop_id is not None:
+            pop_statement = pop_statement.where(PopPeriod.pop_id == pop_id)
+        pop_rows = db.exec(pop_statement).all()
+        party_rows = db.exec(
+            select(PartyPeriod, Party)
+            .join(Party, PartyPeriod.party_id == Party.id)
+            .where(PartyPeriod.period_id == period_id)
+            .order_by(PartyPeriod.id)
+        ).all()
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+    return build_snapshot(period, pop_rows, party_rows)
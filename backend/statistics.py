@@ -1,8 +1,10 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from fastapi import HTTPException
-from sqlmodel import Session, select, func
+from sqlmodel import Session, select, func, and_, true
 from sqlalchemy.exc import SQLAlchemyError
-from models import PopPeriod
+from models import Period, Pop, Party, PopPeriod, PopVote, ElectionResult, PeriodAggregate
+from simulation import SPECIAL_PARTIES_CONFIG, get_voting_behavior
+from snapshot import load_period_snapshots
 
 
 def get_pop_size_sum(db: Session, period_id: int) -> Dict[str, Any]:
@@ -20,10 +22,9 @@ def get_pop_size_sum(db: Session, period_id: int) -> Dict[str, Any]:
         HTTPException: If database error occurs
     """
     try:
-        statement = select(func.sum(PopPeriod.pop_size)).where(PopPeriod.period_id == period_id)
-        result = db.exec(statement).first()
-        
-        total_pop_size = result if result is not None else 0
+        # Maintained with every PopPeriod write, so this is a primary key lookup
+        aggregate = db.get(PeriodAggregate, period_id)
+        total_pop_size = aggregate.total_pop_size if aggregate is not None else 0
         
         return {
             "period_id": period_id,
@@ -32,4 +33,270 @@ def get_pop_size_sum(db: Session, period_id: int) -> Dict[str, Any]:
     except SQLAlchemyError as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+def get_period_aggregates(db: Session, period_id: int) -> Dict[str, Any]:
+    """
+    Get the materialized aggregates of a specific period.
+    
+    Args:
+        db: Database session
+        period_id: The ID of the period
+    
+    Returns:
+        Dict containing period_id, total_pop_size, total_eligible_voters,
+        pop_count and party_count
+    
+    Raises:
+        HTTPException: If the period does not exist or a database error occurs
+    """
+    try:
+        aggregate = db.get(PeriodAggregate, period_id)
+        if aggregate is None:
+            if not db.get(Period, period_id):
+                raise HTTPException(status_code=404, detail="Period not found")
+            # Periods without any PopPeriod or PartyPeriod write yet
+            aggregate = PeriodAggregate(period_id=period_id)
+        
+        return aggregate.model_dump()
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+def get_pop_composition(db: Session, period_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get pop_size and share of total population of every pop in every period.
+    
+    Totals and shares are calculated in the database with a window function,
+    so the whole matrix comes from a single query.
+    
+    Args:
+        db: Database session
+        period_id: Optional ID of the only period to include
+    
+    Returns:
+        Dict containing the periods ordered by year with their total_pop_size and
+        one entry per pop whose pop_size and percentage lists line up with the
+        periods (None where the pop has no PopPeriod)
+    
+    Raises:
+        HTTPException: If database error occurs
+    """
+    try:
+        total_pop_size = func.sum(PopPeriod.pop_size).over(partition_by=Period.id)
+        statement = (
+            select(
+                Period.id,
+                Period.year,
+                Pop.id,
+                Pop.name,
+                PopPeriod.pop_size,
+                total_pop_size,
+                PopPeriod.pop_size * 100.0 / func.nullif(total_pop_size, 0),
+            )
+            .select_from(Period)
+            .outerjoin(Pop, true())
+            .outerjoin(
+                PopPeriod,
+                and_(PopPeriod.period_id == Period.id, PopPeriod.pop_id == Pop.id),
+            )
+            .order_by(Period.year, Pop.id)
+        )
+        if period_id is not None:
+            statement = statement.where(Period.id == period_id)
+        rows = db.exec(statement).all()
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    periods = []
+    pops = {}
+    for row_period_id, year, pop_id, name, pop_size, total, percentage in rows:
+        if not periods or periods[-1]["period_id"] != row_period_id:
+            periods.append({"period_id": row_period_id, "year": year, "total_pop_size": total or 0})
+        if pop_id is None:
+            continue
+        pop = pops.setdefault(pop_id, {"pop_id": pop_id, "name": name, "pop_size": [], "percentage": []})
+        pop["pop_size"].append(pop_size)
+        if pop_size is None:
+            pop["percentage"].append(None)
+        else:
+            pop["percentage"].append(round(percentage, 2) if percentage is not None else 0)
+
+    return {"periods": periods, "pops": list(pops.values())}
+
+
+def get_party_results_over_time(db: Session, party_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get percentage and seats of every party in every period with a single query.
+    
+    Args:
+        db: Database session
+        party_id: Optional ID of the only party to include
+    
+    Returns:
+        Dict containing the periods ordered by year and one entry per party whose
+        percentage and seats lists line up with the periods (None where the
+        period has no election result for the party)
+    
+    Raises:
+        HTTPException: If database error occurs
+    """
+    try:
+        statement = (
+            select(
+                Period.id,
+                Period.year,
+                Party.id,
+                Party.name,
+                Party.full_name,
+                Party.color,
+                Party.valid_from,
+                Party.valid_until,
+                ElectionResult.percentage,
+                ElectionResult.seats,
+            )
+            .select_from(Period)
+            .join(Party, true())
+            .outerjoin(
+                ElectionResult,
+                and_(
+                    ElectionResult.period_id == Period.id,
+                    ElectionResult.party_id == Party.id,
+                ),
+            )
+            .order_by(Period.year, Party.id)
+        )
+        if party_id is not None:
+            statement = statement.where(Party.id == party_id)
+        rows = db.exec(statement).all()
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    periods = []
+    parties = {}
+    for (period_id, year, row_party_id, name, full_name, color, valid_from,
+         valid_until, percentage, seats) in rows:
+        if not periods or periods[-1]["period_id"] != period_id:
+            periods.append({"period_id": period_id, "year": year})
+        party = parties.setdefault(row_party_id, {
+            "party_id": row_party_id,
+            "name": name,
+            "full_name": full_name,
+            "color": color,
+            "valid_from": valid_from,
+            "valid_until": valid_until,
+            "percentage": [],
+            "seats": [],
+        })
+        party["percentage"].append(percentage)
+        party["seats"].append(seats)
+
+    return {
+        "periods": periods,
+        "parties": list(parties.values())
+    }
+
+
+def get_pop_voting_behavior_over_time(db: Session, pop_id: int) -> Dict[str, Any]:
+    """
+    Get the vote share of every party within one pop across all periods.
+    
+    Shares are the percentages of get_voting_behavior, i.e. each party's share
+    of the pop's adjusted scores (Non-Voters and Small Parties included). The
+    pop is scored against the parties of every period it exists in, with the
+    snapshots of all those periods loaded at once.
+    
+    Args:
+        db: Database session
+        pop_id: The ID of the pop
+    
+    Returns:
+        Dict containing the periods ordered by year (flagged whether their votes
+        were stored) and one entry per party whose percentage list lines up with
+        the periods (None where the pop or party is absent in that period)
+    
+    Raises:
+        HTTPException: If the pop does not exist or a database error occurs
+    """
+    try:
+        if not db.get(Pop, pop_id):
+            raise HTTPException(status_code=404, detail="Pop not found")
+
+        statement = (
+            select(
+                Period.id,
+                Period.year,
+                PopPeriod.id,
+                func.count(PopVote.id),
+            )
+            .select_from(Period)
+            .outerjoin(
+                PopPeriod,
+                and_(PopPeriod.period_id == Period.id, PopPeriod.pop_id == pop_id),
+            )
+            .outerjoin(
+                PopVote,
+                and_(PopVote.period_id == Period.id, PopVote.pop_id == pop_id),
+            )
+            .group_by(Period.id, Period.year, PopPeriod.id)
+            .order_by(Period.year, Period.id)
+        )
+        rows = db.exec(statement).all()
+    except HTTPException:
+        raise
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    periods = []
+    period_shares = []
+    shares_by_period = {}
+    for period_id, year, pop_period_id, vote_count in rows:
+        periods.append({"period_id": period_id, "year": year, "simulated": vote_count > 0})
+        period_shares.append({})
+        if pop_period_id is not None:
+            shares_by_period[period_id] = period_shares[-1]
+
+    for period_id, snapshot in load_period_snapshots(db, shares_by_period, pop_id).items():
+        pop_period = snapshot.get_pop_period(pop_id)
+        if pop_period is not None:
+            for entry in get_voting_behavior(db, pop_period, snapshot):
+                shares_by_period[period_id][entry["party_id"]] = entry["percentage"]
+
+    party_ids = sorted(
+        {party_id for shares in period_shares for party_id in shares},
+        key=lambda party_id: (party_id < 0, abs(party_id)),
+    )
+    try:
+        party_rows = db.exec(select(Party).where(Party.id.in_(party_ids))).all()
+    except SQLAlchemyError as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    party_info = {party.id: party for party in party_rows}
+
+    parties = []
+    for party_id in party_ids:
+        party = party_info.get(party_id)
+        if party is None and party_id not in SPECIAL_PARTIES_CONFIG:
+            continue
+        percentages = [shares.get(party_id) for shares in period_shares]
+        parties.append({
+            "party_id": party_id,
+            "name": party.name if party else SPECIAL_PARTIES_CONFIG[party_id]["name"],
+            "full_name": party.full_name if party else SPECIAL_PARTIES_CONFIG[party_id]["full_name"],
+            "color": party.color if party else None,
+            "valid_from": party.valid_from if party else None,
+            "valid_until": party.valid_until if party else None,
+            "percentage": percentages,
+        })
+
+    return {"pop_id": pop_id, "periods": periods, "parties": parties}
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from apportionment import apportion, dhondt, largest_remainder, largest_remainder_trials, sainte_lague
+
+
+def test_largest_remainder_hare_table():
+    # Quotas 4.7, 1.6, 1.58, 1.2, 0.61, 0.31: seven seats by integer part,
+    # the remaining three go to the remainders .7, .61 and .6
+    votes = [47000, 16000, 15800, 12000, 6100, 3100]
+    assert largest_remainder(votes, 10) == [5, 2, 1, 1, 1, 0]
+
+
+def test_dhondt_table():
+    # Highest quotients: 100k, 80k, 50k, 40k, 33.3k, 30k, 26.7k, 25k
+    assert dhondt([100000, 80000, 30000, 20000], 8) == [4, 3, 1, 0]
+
+
+def test_sainte_lague_table():
+    # Highest quotients: 100k, 80k, 33.3k, 30k, 26.7k, 20k (A), 20k (D), 16k
+    assert sainte_lague([100000, 80000, 30000, 20000], 8) == [3, 3, 1, 1]
+
+
+@pytest.mark.parametrize("method", ["hare", "dhondt", "sainte_lague"])
+def test_ties_go_to_the_party_listed_first(method):
+    assert apportion([100, 100], 1, method) == [1, 0]
+    assert apportion([100, 100, 100], 2, method) == [1, 1, 0]
+
+
+def test_hare_remainder_tie():
+    # Both quotas are 1.5; the leftover seat goes to the first party
+    assert largest_remainder([50, 50], 3) == [2, 1]
+
+
+def test_without_votes_seats_go_round_robin():
+    assert largest_remainder([0, 0, 0], 7) == [3, 2, 2]
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        apportion([1, 2], 5, "unknown")
+    with pytest.raises(ValueError):
+        apportion([1, 2], -1)
+
+
+def test_largest_remainder_trials_matches_scalar():
+    rng = np.random.default_rng(7)
+    votes = rng.integers(0, 1000, size=(200, 6))
+    # Ties in the remainders, and rows where seats_left >= parties
+    votes[0] = [50, 50, 0, 0, 0, 0]
+    votes[1] = 0
+    votes[2] = [1, 0, 0, 0, 0, 0]
+    votes[3] = [100, 100, 100, 100, 100, 100]
+    for seats in (0, 1, 5, 6, 13, 100):
+        expected = [largest_remainder(row.tolist(), seats) for row in votes]
+        assert largest_remainder_trials(votes, seats).tolist() == expected
@@ -0,0 +1,54 @@
+from itertools import combinations
+import pytest
+from simulation import find_minimal_winning_coalitions
+
+
+def brute_force_coalitions(seats, majority_threshold, max_parties=None):
+    """Every subset with a majority that loses it when any member leaves."""
+    max_size = len(seats) if max_parties is None else max_parties
+    coalitions = []
+    for size in range(1, max_size + 1):
+        for coalition in combinations(range(len(seats)), size):
+            total = sum(seats[index] for index in coalition)
+            if total >= majority_threshold and all(
+                total - seats[index] < majority_threshold for index in coalition
+            ):
+                coalitions.append(coalition)
+    return coalitions
+
+
+@pytest.mark.parametrize(
+    "seats",
+    [
+        [45, 30, 15, 10],
+        [51, 20, 19, 10],
+        [25, 25, 25, 25],
+        [40, 20, 20, 10, 5, 5],
+        [12, 11, 10, 9, 8, 8, 7, 6, 5, 4, 4, 3, 3, 2, 1, 1, 1],
+        [30, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 1],
+    ],
+)
+def test_matches_brute_force(seats):
+    majority_threshold = sum(seats) // 2 + 1
+    assert find_minimal_winning_coalitions(seats, majority_threshold) == brute_force_coalitions(
+        seats, majority_threshold
+    )
+
+
+@pytest.mark.parametrize("max_parties", [0, 1, 2, 3, 4])
+def test_max_parties_prunes_to_brute_force(max_parties):
+    # Many small parties: most branches are cut because the largest parties still
+    # available within max_parties cannot reach the threshold
+    seats = [20, 15, 10, 8, 8, 7, 6, 6, 5, 5, 4, 3, 2, 1]
+    majority_threshold = sum(seats) // 2 + 1
+    assert find_minimal_winning_coalitions(seats, majority_threshold, max_parties) == brute_force_coalitions(
+        seats, majority_threshold, max_parties
+    )
+
+
+def test_single_majority_party():
+    assert find_minimal_winning_coalitions([60, 25, 15], 51) == [(0,)]
+
+
+def test_no_coalition_reaches_threshold():
+    assert find_minimal_winning_coalitions([10, 10, 10], 31) == []
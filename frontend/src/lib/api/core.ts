@@ -162,6 +162,14 @@ export const API = {
     });
   },
 
+  // Partial updates of many PopPeriod/PartyPeriod rows in one transaction
+  async batchUpdate<T>(model: 'PopPeriod' | 'PartyPeriod', updates: Array<Partial<T> & { id: number }>): Promise<ApiResponse<T[]>> {
+    return request<T[]>(`/${MODEL_ENDPOINTS[model]}/batch`, {
+      method: 'PATCH',
+      body: JSON.stringify(updates),
+    });
+  },
+
   async delete<T>(model: ModelName, id: number): Promise<ApiResponse<T>> {
     return request<T>(`/${MODEL_ENDPOINTS[model]}/${id}`, {
       method: 'DELETE',
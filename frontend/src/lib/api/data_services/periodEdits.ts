@@ -0,0 +1,61 @@
+import { API, type ApiResponse } from '../core';
+
+type BatchModel = 'PopPeriod' | 'PartyPeriod';
+
+// Edits arriving within this window are sent together
+const FLUSH_DELAY_MS = 300;
+
+// Pending partial updates per model, merged per row id
+const pendingUpdates: Record<BatchModel, Map<number, Record<string, any>>> = {
+  PopPeriod: new Map(),
+  PartyPeriod: new Map()
+};
+let scheduledFlush: Promise<ApiResponse<any[]>> | null = null;
+
+// Queue a partial update; resolves once the batch containing it is saved
+export function queueUpdate(model: BatchModel, id: number, changes: Record<string, any>): Promise<ApiResponse<any[]>> {
+  const pending = pendingUpdates[model];
+  pending.set(id, { ...pending.get(id), ...changes });
+
+  if (!scheduledFlush) {
+    scheduledFlush = new Promise(resolve => {
+      setTimeout(() => {
+        scheduledFlush = null;
+        flushUpdates().then(resolve);
+      }, FLUSH_DELAY_MS);
+    });
+  }
+  return scheduledFlush;
+}
+
+// Send all pending updates now, one PATCH request per model
+export async function flushUpdates(): Promise<ApiResponse<any[]>> {
+  const rows: any[] = [];
+
+  for (const model of Object.keys(pendingUpdates) as BatchModel[]) {
+    const pending = pendingUpdates[model];
+    if (pending.size === 0) continue;
+
+    const updates = Array.from(pending, ([id, changes]) => ({ ...changes, id }));
+    pending.clear();
+
+    const result = await API.batchUpdate(model, updates);
+    if (!result.success) {
+      return { success: false, error: result.error };
+    }
+    rows.push(...(result.data || []));
+  }
+
+  return { success: true, data: rows };
+}
+
+// Save the changes of one row together with everything still pending
+export async function saveUpdate<T>(model: BatchModel, id: number, changes: Record<string, any>): Promise<ApiResponse<T>> {
+  queueUpdate(model, id, changes);
+  const result = await flushUpdates();
+
+  if (!result.success) {
+    return { success: false, error: result.error };
+  }
+  return { success: true, data: result.data?.find(row => row.id === id) as T };
+}
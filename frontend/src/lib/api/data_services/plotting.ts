@@ -1,6 +1,5 @@
 import { API, type PopPeriod, type PartyPeriod, type Pop, type Party } from '../core';
 import type { EnrichedElectionResult } from './simulation';
-import { getVotingBehavior } from './simulation';
 
 const SCALING_CONFIG = {
   PARTY_BASE_SIZE: 5,
@@ -206,42 +205,12 @@ interface PartyInfo {
   valid_until?: number;
 }
 
-// Helper function to fetch and sort periods
-async function fetchSortedPeriods(): Promise<Period[]> {
-  const periodsResponse = await API.getAll('Period');
-  if (!periodsResponse.success || !periodsResponse.data) {
-    throw new Error('Failed to fetch periods');
-  }
-  
-  const periods = periodsResponse.data as Period[];
-  return periods.sort((a, b) => a.year - b.year);
-}
-
-// Helper function to fetch parties
-async function fetchParties(): Promise<PartyInfo[]> {
-  const partiesResponse = await API.getAll('Party');
-  if (!partiesResponse.success || !partiesResponse.data) {
-    throw new Error('Failed to fetch parties');
-  }
-  
-  return partiesResponse.data as PartyInfo[];
-}
-
 // Helper function to check if party was valid in a given period
 function isPartyValidInPeriod(party: PartyInfo, period: Period): boolean {
   return (!party.valid_from || period.year >= party.valid_from) && 
          (!party.valid_until || period.year <= party.valid_until);
 }
 
-// Helper function to create party map for quick lookups
-function createPartyMap(parties: PartyInfo[]): Map<string, PartyInfo> {
-  const partyMap = new Map<string, PartyInfo>();
-  parties.forEach(party => {
-    partyMap.set(party.name, party);
-  });
-  return partyMap;
-}
-
 // Helper function to build trace for a party
 function buildPartyTrace(party: PartyInfo, periods: Period[], getData: (period: Period, party: PartyInfo) => number | null): LineGraphTrace {
   const trace: LineGraphTrace = {
@@ -269,42 +238,44 @@ function buildPartyTrace(party: PartyInfo, periods: Period[], getData: (period:
   return trace;
 }
 
+interface PartyResultsSeries extends Omit<PartyInfo, 'id'> {
+  party_id: number;
+  percentage: (number | null)[];
+  seats: (number | null)[];
+}
+
+interface PartyResultsOverTime {
+  periods: Array<{ period_id: number; year: number }>;
+  parties: PartyResultsSeries[];
+}
+
 export async function getPartyResultsOverTime(partyId?: number): Promise<LineGraphData> {
   try {
     console.log('getPartyResultsOverTime - Starting fetch for partyId:', partyId);
     
-    // Fetch periods and parties
-    const [sortedPeriods, allParties] = await Promise.all([
-      fetchSortedPeriods(),
-      fetchParties()
-    ]);
-    
-    console.log('getPartyResultsOverTime - Sorted periods:', sortedPeriods);
-    
-    const parties = partyId ? allParties.filter(p => p.id === partyId) : allParties;
-    console.log('getPartyResultsOverTime - Parties to process:', parties.map(p => `${p.name} (id: ${p.id})`));
+    // The backend returns the whole party x period matrix in one request
+    const query = partyId ? `?party_id=${partyId}` : '';
+    const resultsResponse = await API.getStatistics(`party-results${query}`);
+    if (!resultsResponse.success || !resultsResponse.data) {
+      throw new Error('Failed to fetch party results over time');
+    }
     
-    // Fetch election results for all periods
-    const periodElectionData: { [periodId: number]: any[] } = {};
+    const { periods, parties } = resultsResponse.data as PartyResultsOverTime;
+    const sortedPeriods: Period[] = periods.map(p => ({ id: p.period_id, year: p.year }));
+    const periodIndex = new Map(sortedPeriods.map((period, index) => [period.id, index]));
     
-    for (const period of sortedPeriods) {
-      console.log(`getPartyResultsOverTime - Fetching results for period ${period.id} (${period.year})`);
-      const resultsResponse = await API.getAll('ElectionResult', 0, 100, undefined, undefined, { period_id: period.id });
-      
-      periodElectionData[period.id] = resultsResponse.success && resultsResponse.data ? resultsResponse.data : [];
-      console.log(`getPartyResultsOverTime - Period ${period.year}: ${periodElectionData[period.id].length} results`);
-    }
+    console.log('getPartyResultsOverTime - Sorted periods:', sortedPeriods);
+    console.log('getPartyResultsOverTime - Parties to process:', parties.map(p => `${p.name} (id: ${p.party_id})`));
     
     // Build traces
     const traces: LineGraphTrace[] = [];
     
     for (const party of parties) {
-      console.log(`getPartyResultsOverTime - Processing party: ${party.name} (id: ${party.id})`);
+      console.log(`getPartyResultsOverTime - Processing party: ${party.name} (id: ${party.party_id})`);
       
-      const trace = buildPartyTrace(party, sortedPeriods, (period, party) => {
-        const periodResults = periodElectionData[period.id] || [];
-        const partyResult = periodResults.find((result: any) => result.party_id === party.id);
-        return partyResult ? (partyResult.percentage || 0) : null;
+      const trace = buildPartyTrace({ ...party, id: party.party_id }, sortedPeriods, (period) => {
+        const percentage = party.percentage[periodIndex.get(period.id) ?? -1];
+        return percentage !== null && percentage !== undefined ? percentage : null;
       });
       
       if (trace.x.length > 0) {
@@ -325,70 +296,43 @@ export async function getPartyResultsOverTime(partyId?: number): Promise<LineGra
   }
 }
 
+interface PopVotingBehaviorOverTime {
+  pop_id: number;
+  periods: Array<{ period_id: number; year: number; simulated: boolean }>;
+  parties: Array<Omit<PartyInfo, 'id'> & { party_id: number; percentage: (number | null)[] }>;
+}
+
 export async function getPopulationVotingBehavior(popId: number): Promise<LineGraphData> {
   try {
     console.log('getPopulationVotingBehavior - Starting fetch for popId:', popId);
     
-    // Fetch periods and parties
-    const [sortedPeriods, allParties] = await Promise.all([
-      fetchSortedPeriods(),
-      fetchParties()
-    ]);
-    
-    console.log('getPopulationVotingBehavior - Sorted periods:', sortedPeriods);
-    
-    // Create party map for quick lookups
-    const partyMap = createPartyMap(allParties);
-    console.log('getPopulationVotingBehavior - Party mapping created:', Array.from(partyMap.keys()));
-    
-    // Fetch voting behavior data for all periods
-    const periodVotingBehaviorData: { [periodId: number]: any[] } = {};
-    
-    for (const period of sortedPeriods) {
-      console.log(`getPopulationVotingBehavior - Fetching voting behavior for period ${period.id} (${period.year})`);
-      const behaviorResponse = await getVotingBehavior(period.id, popId);
-      
-      periodVotingBehaviorData[period.id] = behaviorResponse.success && behaviorResponse.data ? behaviorResponse.data : [];
-      console.log(`getPopulationVotingBehavior - Period ${period.year}: ${periodVotingBehaviorData[period.id].length} voting behavior entries`);
+    // The backend returns the pop's party shares for all periods in one request
+    const behaviorResponse = await API.getStatistics(`pop/${popId}/voting-behavior`);
+    if (!behaviorResponse.success || !behaviorResponse.data) {
+      throw new Error('Failed to fetch population voting behavior over time');
     }
     
-    // Extract unique parties from voting behavior data
-    const allPartyNames = new Set<string>();
-    Object.values(periodVotingBehaviorData).forEach(periodData => {
-      periodData.forEach((entry: any) => {
-        if (entry.party_name) {
-          allPartyNames.add(entry.party_name);
-        }
-      });
-    });
+    const { periods, parties } = behaviorResponse.data as PopVotingBehaviorOverTime;
+    const sortedPeriods: Period[] = periods.map(p => ({ id: p.period_id, year: p.year }));
+    const periodIndex = new Map(sortedPeriods.map((period, index) => [period.id, index]));
     
-    console.log('getPopulationVotingBehavior - Unique parties found:', Array.from(allPartyNames));
+    console.log('getPopulationVotingBehavior - Sorted periods:', sortedPeriods);
+    console.log('getPopulationVotingBehavior - Unique parties found:', parties.map(p => p.name));
     
     // Build traces
     const traces: LineGraphTrace[] = [];
     
-    for (const partyName of allPartyNames) {
-      console.log(`getPopulationVotingBehavior - Processing party: ${partyName}`);
-      
-      const partyInfo = partyMap.get(partyName);
-      const fakeParty: PartyInfo = {
-        id: partyInfo?.id || 0,
-        name: partyName,
-        full_name: partyInfo?.full_name || partyName,
-        color: partyInfo?.color,
-        valid_from: partyInfo?.valid_from,
-        valid_until: partyInfo?.valid_until
-      };
+    for (const party of parties) {
+      console.log(`getPopulationVotingBehavior - Processing party: ${party.name}`);
       
-      const trace = buildPartyTrace(fakeParty, sortedPeriods, (period, party) => {
-        const periodData = periodVotingBehaviorData[period.id] || [];
-        const partyBehavior = periodData.find((entry: any) => entry.party_name === party.name);
-        return (partyBehavior && partyBehavior.percentage !== undefined) ? (partyBehavior.percentage || 0) : null;
+      const trace = buildPartyTrace({ ...party, id: party.party_id > 0 ? party.party_id : 0 }, sortedPeriods, (period) => {
+        const percentage = party.percentage[periodIndex.get(period.id) ?? -1];
+        return percentage !== null && percentage !== undefined ? percentage : null;
       });
       
       if (trace.x.length > 0) {
         traces.push(trace);
-        console.log(`getPopulationVotingBehavior - Added trace for ${partyName} with ${trace.x.length} data points:`, trace.y);
+        console.log(`getPopulationVotingBehavior - Added trace for ${party.name} with ${trace.x.length} data points:`, trace.y);
       }
     }
     
@@ -420,42 +364,40 @@ const POPULATION_COLORS = [
   '#4299e1', // light blue
 ] as const;
 
+interface PopCompositionOverTime {
+  periods: Array<{ period_id: number; year: number; total_pop_size: number }>;
+  pops: Array<{ pop_id: number; name: string; pop_size: (number | null)[]; percentage: (number | null)[] }>;
+}
+
 export async function getPopulationComposition(): Promise<LineGraphData> {
   try {
     console.log('getPopulationComposition - Starting fetch for all population sizes over time');
     
-    // Fetch periods and populations
-    const [sortedPeriods, allPops] = await Promise.all([
-      fetchSortedPeriods(),
-      fetchPops()
-    ]);
-    
-    console.log('getPopulationComposition - Sorted periods:', sortedPeriods);
-    console.log('getPopulationComposition - Populations available:', allPops.map(p => `${p.name} (id: ${p.id})`));
+    // The backend returns the pop x period composition matrix in one request
+    const compositionResponse = await API.getStatistics('pop-composition');
+    if (!compositionResponse.success || !compositionResponse.data) {
+      throw new Error('Failed to fetch population composition');
+    }
     
-    // Fetch population period data for all periods
-    const periodPopData: { [periodId: number]: any[] } = {};
+    const { periods, pops } = compositionResponse.data as PopCompositionOverTime;
+    const sortedPeriods: Period[] = periods.map(p => ({ id: p.period_id, year: p.year }));
+    const periodIndex = new Map(sortedPeriods.map((period, index) => [period.id, index]));
     
-    for (const period of sortedPeriods) {
-      console.log(`getPopulationComposition - Fetching pop data for period ${period.id} (${period.year})`);
-      const popResponse = await API.getAll('PopPeriod', 0, 100, undefined, undefined, { period_id: period.id });
-      
-      periodPopData[period.id] = popResponse.success && popResponse.data ? popResponse.data : [];
-      console.log(`getPopulationComposition - Period ${period.year}: ${periodPopData[period.id].length} pop period entries`);
-    }
+    console.log('getPopulationComposition - Sorted periods:', sortedPeriods);
+    console.log('getPopulationComposition - Populations available:', pops.map(p => `${p.name} (id: ${p.pop_id})`));
     
     // Build traces for each population
     const traces: LineGraphTrace[] = [];
     
-    allPops.forEach((pop, index) => {
-      console.log(`getPopulationComposition - Processing population: ${pop.name} (id: ${pop.id})`);
+    pops.forEach((pop, index) => {
+      console.log(`getPopulationComposition - Processing population: ${pop.name} (id: ${pop.pop_id})`);
       
       // Assign color from the palette, cycling through if more pops than colors
       const colorIndex = index % POPULATION_COLORS.length;
       const assignedColor = POPULATION_COLORS[colorIndex];
       
       const fakeParty: PartyInfo = {
-        id: pop.id,
+        id: pop.pop_id,
         name: pop.name,
         full_name: pop.name, // For populations, name and full_name are the same
         color: assignedColor,
@@ -463,10 +405,9 @@ export async function getPopulationComposition(): Promise<LineGraphData> {
         valid_until: undefined
       };
       
-      const trace = buildPartyTrace(fakeParty, sortedPeriods, (period, party) => {
-        const periodData = periodPopData[period.id] || [];
-        const popData = periodData.find((entry: any) => entry.pop_id === party.id);
-        return (popData && popData.pop_size !== undefined) ? (popData.pop_size || 0) : null;
+      const trace = buildPartyTrace(fakeParty, sortedPeriods, (period) => {
+        const popSize = pop.pop_size[periodIndex.get(period.id) ?? -1];
+        return popSize !== null && popSize !== undefined ? popSize : null;
       });
       
       if (trace.x.length > 0) {
@@ -486,13 +427,3 @@ export async function getPopulationComposition(): Promise<LineGraphData> {
     return { traces: [], periods: [] };
   }
 }
-
-// Helper function to fetch populations (similar to fetchParties)
-async function fetchPops(): Promise<Array<{ id: number; name: string; color?: string }>> {
-  const popsResponse = await API.getAll('Pop');
-  if (!popsResponse.success || !popsResponse.data) {
-    throw new Error('Failed to fetch populations');
-  }
-  
-  return popsResponse.data as Array<{ id: number; name: string; color?: string }>;
-}
\ No newline at end of file
@@ -1,4 +1,5 @@
 import { API } from '../core';
+import { queueUpdate } from './periodEdits';
 
 // Population ratio calculation with auto-save
 export async function calculatePopulationRatio(popSize: number, periodId: number, popPeriodId: number): Promise<string> {
@@ -8,8 +9,8 @@ export async function calculatePopulationRatio(popSize: number, periodId: number
       return 'Ratio: 0%';
     }
 
-    // First: Auto-save the pop_size value to database
-    const updateResult = await API.update('PopPeriod', popPeriodId, { pop_size: popSize });
+    // First: Auto-save the pop_size value to database, batched with other edits
+    const updateResult = await queueUpdate('PopPeriod', popPeriodId, { pop_size: popSize });
     
     if (!updateResult.success) {
       console.warn('Failed to auto-save pop_size:', updateResult.error);